@@ -1,6 +1,31 @@
 from django.contrib import admin
-from .models import create_blog
+from .jobs import retry
+from .models import BlogStats, Job, MirroredBlog, SyncRun, create_blog
 
 
 # Register your models here.
-admin.site.register(create_blog)
\ No newline at end of file
+admin.site.register(create_blog)
+admin.site.register(BlogStats)
+admin.site.register(SyncRun)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'status', 'attempts', 'run_at', 'locked_by')
+    list_filter = ('status', 'task')
+    actions = ['retry_jobs']
+
+    @admin.action(description='Retry selected jobs')
+    def retry_jobs(self, request, queryset):
+        self.message_user(request, f'{retry(queryset)} jobs queued again.')
+
+
+@admin.register(MirroredBlog)
+class MirroredBlogAdmin(admin.ModelAdmin):
+    # Edits belong upstream; the next sync would undo them here
+    list_display = ('upstream_id', 'slug', 'Category', 'date', 'mirrored_at')
+    list_filter = ('Category',)
+    search_fields = ('slug', 'title')
+
+    def has_change_permission(self, request, obj=None):
+        return False
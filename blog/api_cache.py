@@ -0,0 +1,235 @@
+"""
+Stale-while-revalidate cache for the upstream blog collection.
+
+``get_blogs_from_api()`` serves the ``blogs/`` collection from Django's
+cache framework. Entries younger than ``CACHE_TTL`` are returned as is;
+entries up to ``CACHE_STALE_TTL`` seconds older are still returned while a
+single background thread revalidates them. Refreshes are collapsed with a
+lock entry in the same cache, so with a shared backend (file or database)
+only one worker across all processes goes upstream per TTL window.
+
+Refreshes send the upstream ``ETag`` back as ``If-None-Match``; a 304
+just extends the cached entry. ``peek_stamp()`` only changes when the
+content does, so indexes built from the collection and pages cached
+against it (``blog.page_cache``) survive a revalidation untouched.
+
+The last collection fetched is also kept without expiry as a snapshot,
+returned when the entry has expired and upstream can't be reached (e.g.
+while ``blog.breaker`` has the circuit open).
+"""
+import asyncio
+import threading
+import time
+
+from django.core.cache import caches
+from django.db import connections
+
+from .api_client import api_settings, revalidate_blogs_from_api
+
+CACHE_KEY = 'blog:api:blogs'
+LOCK_KEY = 'blog:api:blogs:refresh'
+GENERATION_KEY = 'blog:api:blogs:generation'
+STAMP_KEY = 'blog:api:blogs:stamp'
+SNAPSHOT_KEY = 'blog:api:blogs:snapshot'
+
+# How often a request without data polls for a refresh running elsewhere
+POLL_INTERVAL = 0.05
+
+
+def _cache():
+    return caches[api_settings()['CACHE_ALIAS']]
+
+
+def _generation(cache):
+    cache.add(GENERATION_KEY, 0, None)
+    return cache.get(GENERATION_KEY, 0)
+
+
+def _next_entry(previous, result):
+    """
+    The entry to cache after a fetch, or None if it failed.
+
+    When upstream answered 304, or sent the same content again, the
+    previous data and stamp are kept.
+    """
+    status, data, etag, version = result
+    now = time.time()
+    if previous is not None and (status == 304 or (status == 200 and version == previous.get('version'))):
+        return {
+            **previous,
+            'fetched_at': now,
+            'stamp': previous.get('stamp', now),
+            'etag': etag or previous.get('etag'),
+        }
+    if status != 200:
+        return None
+    return {'data': data, 'fetched_at': now, 'stamp': now, 'etag': etag, 'version': version}
+
+
+def _changed(previous, entry):
+    return previous is None or previous.get('stamp') != entry['stamp']
+
+
+def _refresh():
+    """
+    Fetch the collection and store it, unless another refresh holds the lock.
+
+    Returns the fetched data, or None if the fetch failed or was skipped.
+    """
+    options = api_settings()
+    cache = _cache()
+    if not cache.add(LOCK_KEY, 1, options['CACHE_LOCK_TIMEOUT']):
+        return None
+    try:
+        generation = _generation(cache)
+        previous = cache.get(CACHE_KEY)
+        entry = _next_entry(previous, revalidate_blogs_from_api(previous and previous.get('etag')))
+        if entry is None:
+            return None
+        # Don't resurrect data fetched before a write invalidated the cache
+        if _generation(cache) == generation:
+            timeout = options['CACHE_TTL'] + options['CACHE_STALE_TTL']
+            cache.set_many({CACHE_KEY: entry, STAMP_KEY: entry['stamp']}, timeout)
+            if _changed(previous, entry):
+                cache.set(SNAPSHOT_KEY, entry['data'], None)
+        return entry['data']
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def _refresh_in_background():
+    def run():
+        try:
+            _refresh()
+        finally:
+            connections.close_all()
+
+    threading.Thread(target=run, name='blog-api-cache-refresh', daemon=True).start()
+
+
+def _wait_for_refresh(cache, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and cache.get(LOCK_KEY) is not None:
+        time.sleep(POLL_INTERVAL)
+    return cache.get(CACHE_KEY)
+
+
+def peek_blogs():
+    """
+    Return the cached collection entry (fresh or stale) without going upstream
+    """
+    return _cache().get(CACHE_KEY)
+
+
+def peek_stamp():
+    """
+    Return when the cached collection last changed, without loading it
+    """
+    return _cache().get(STAMP_KEY)
+
+
+def peek_collection():
+    """
+    Return the cached collection, or its last snapshot, without going upstream
+    """
+    cache = _cache()
+    entry = cache.get(CACHE_KEY)
+    return entry['data'] if entry is not None else cache.get(SNAPSHOT_KEY)
+
+
+async def apeek_stamp():
+    return await _cache().aget(STAMP_KEY)
+
+
+def warm_blogs():
+    """
+    Start a background fetch of the collection unless one is running
+    """
+    if _cache().get(LOCK_KEY) is None:
+        _refresh_in_background()
+
+
+def get_blogs_from_api():
+    """
+    Fetch blogs from REST API through the cache
+    """
+    options = api_settings()
+    cache = _cache()
+    entry = cache.get(CACHE_KEY)
+    if entry is not None:
+        if time.time() - entry['fetched_at'] >= options['CACHE_TTL']:
+            if cache.get(LOCK_KEY) is None:
+                _refresh_in_background()
+        return entry['data']
+
+    # Cold cache: fetch, or wait for the request that is already fetching
+    data = _refresh()
+    if data is None:
+        entry = _wait_for_refresh(cache, options['CACHE_LOCK_TIMEOUT'])
+        if entry is not None:
+            return entry['data']
+        # Upstream unreachable: better old posts than none
+        data = cache.get(SNAPSHOT_KEY)
+    return data
+
+
+async def _arefresh():
+    """
+    Async counterpart of ``_refresh()``, fetching through the async client
+    """
+    from .async_api import arevalidate_blogs_from_api
+
+    options = api_settings()
+    cache = _cache()
+    if not await cache.aadd(LOCK_KEY, 1, options['CACHE_LOCK_TIMEOUT']):
+        return None
+    try:
+        await cache.aadd(GENERATION_KEY, 0, None)
+        generation = await cache.aget(GENERATION_KEY, 0)
+        previous = await cache.aget(CACHE_KEY)
+        entry = _next_entry(previous, await arevalidate_blogs_from_api(previous and previous.get('etag')))
+        if entry is None:
+            return None
+        if await cache.aget(GENERATION_KEY, 0) == generation:
+            timeout = options['CACHE_TTL'] + options['CACHE_STALE_TTL']
+            await cache.aset_many({CACHE_KEY: entry, STAMP_KEY: entry['stamp']}, timeout)
+            if _changed(previous, entry):
+                await cache.aset(SNAPSHOT_KEY, entry['data'], None)
+        return entry['data']
+    finally:
+        await cache.adelete(LOCK_KEY)
+
+
+async def aget_blogs_from_api():
+    """
+    Fetch blogs from REST API through the cache (async)
+    """
+    options = api_settings()
+    cache = _cache()
+    entry = await cache.aget(CACHE_KEY)
+    if entry is not None:
+        if time.time() - entry['fetched_at'] >= options['CACHE_TTL']:
+            if await cache.aget(LOCK_KEY) is None:
+                _refresh_in_background()
+        return entry['data']
+
+    data = await _arefresh()
+    if data is None:
+        deadline = time.monotonic() + options['CACHE_LOCK_TIMEOUT']
+        while time.monotonic() < deadline and await cache.aget(LOCK_KEY) is not None:
+            await asyncio.sleep(POLL_INTERVAL)
+        entry = await cache.aget(CACHE_KEY)
+        if entry is not None:
+            return entry['data']
+        data = await cache.aget(SNAPSHOT_KEY)
+    return data
+
+
+def invalidate_blogs():
+    """
+    Drop the cached collection after a create, edit or delete
+    """
+    cache = _cache()
+    _generation(cache)
+    cache.incr(GENERATION_KEY)
+    cache.delete_many([CACHE_KEY, STAMP_KEY])
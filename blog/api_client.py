@@ -0,0 +1,389 @@
+"""
+Shared client for the upstream blog REST API.
+
+Every view that talks to ``REST_API_BASE_URL`` goes through the client
+returned by ``get_client()``: one keep-alive ``requests.Session`` per
+worker process with a bounded connection pool, a retry/backoff policy for
+idempotent requests and per-endpoint timeouts. All of it is configured
+through ``settings.BLOG_API``.
+
+Each call is logged to the ``blog.api`` logger as one line (method,
+endpoint, status, response bytes, latency), also passed as ``extra``
+fields for structured handlers. Successful calls are sampled at
+``LOG_SAMPLE_RATE`` (overridable per endpoint prefix in
+``LOG_SAMPLE_RATES``); failures are always logged. Bodies are only
+logged at DEBUG.
+"""
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from . import breaker, instrumentation
+from .multipart import MultipartStream
+
+DEFAULTS = {
+    'BASE_URL': 'http://127.0.0.1:8000/Api/V1',
+    # Connection pools kept per host, and connections kept per pool
+    'POOL_CONNECTIONS': 4,
+    'POOL_MAXSIZE': 10,
+    # Retries only apply to idempotent methods (GET, PUT, DELETE, ...)
+    'MAX_RETRIES': 2,
+    'BACKOFF_FACTOR': 0.2,
+    'RETRY_STATUSES': (502, 503, 504),
+    # Default timeout, and overrides keyed by endpoint prefix
+    'TIMEOUT': 10,
+    'TIMEOUTS': {},
+    # Cache for the blog collection (see blog/api_cache.py), in seconds
+    'CACHE_ALIAS': 'default',
+    'CACHE_TTL': 30,
+    'CACHE_STALE_TTL': 300,
+    'CACHE_LOCK_TIMEOUT': 15,
+    # Pushing local posts upstream (see blog/sync.py)
+    'SYNC_WORKERS': 4,
+    'SYNC_CHUNK_SIZE': 200,
+    'BULK_ENDPOINT': None,
+    # Circuit breaker (see blog/breaker.py): open after BREAKER_FAILURES
+    # failures within BREAKER_WINDOW seconds, probe again after
+    # BREAKER_RESET_TIMEOUT seconds
+    'BREAKER_FAILURES': 5,
+    'BREAKER_WINDOW': 30,
+    'BREAKER_RESET_TIMEOUT': 30,
+    # Share of successful calls logged, and overrides keyed by endpoint prefix
+    'LOG_SAMPLE_RATE': 1.0,
+    'LOG_SAMPLE_RATES': {},
+    # Longest body logged at DEBUG, in characters
+    'LOG_BODY_LIMIT': 2000,
+}
+
+logger = logging.getLogger('blog.api')
+
+
+def api_settings():
+    """
+    Return ``settings.BLOG_API`` merged over the defaults
+    """
+    options = dict(DEFAULTS)
+    options['BASE_URL'] = getattr(settings, 'REST_API_BASE_URL', DEFAULTS['BASE_URL'])
+    options.update(getattr(settings, 'BLOG_API', {}))
+    return options
+
+
+def _by_prefix(options, overrides, endpoint, default):
+    # The override with the longest prefix of ``endpoint`` wins
+    endpoint = endpoint.lstrip('/')
+    matches = [prefix for prefix in options[overrides] if endpoint.startswith(prefix)]
+    if matches:
+        return options[overrides][max(matches, key=len)]
+    return options[default]
+
+
+def log_call(options, method, endpoint, status=None, size=None, elapsed=0.0, body=None, error=None):
+    """
+    Log one upstream call; ``error`` for calls that got no response
+    """
+    failed = error is not None or status >= 500
+    level = logging.WARNING if failed else logging.INFO
+    if not logger.isEnabledFor(level):
+        return
+    if not failed and random.random() >= _by_prefix(options, 'LOG_SAMPLE_RATES', endpoint, 'LOG_SAMPLE_RATE'):
+        return
+    latency_ms = round(elapsed * 1000, 1)
+    extra = {'method': method, 'endpoint': endpoint, 'status': status, 'bytes': size, 'latency_ms': latency_ms}
+    if error is not None:
+        logger.warning('api %s %s error=%r ms=%s', method, endpoint, error, latency_ms, extra=extra)
+        return
+    logger.log(level, 'api %s %s status=%s bytes=%s ms=%s', method, endpoint, status, size, latency_ms, extra=extra)
+    if body is not None and logger.isEnabledFor(logging.DEBUG):
+        logger.debug('api %s %s body: %s', method, endpoint, body()[:options['LOG_BODY_LIMIT']], extra=extra)
+
+
+class ConnectionStats:
+    """
+    Thread-safe counters for connections opened vs reused by the pool
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+
+    def record_opened(self):
+        with self._lock:
+            self.opened += 1
+
+    def record_reused(self):
+        with self._lock:
+            self.reused += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {'connections_opened': self.opened, 'connections_reused': self.reused}
+
+
+def _counting_pool(base):
+    """
+    Build a urllib3 pool class that reports to ``pool.conn_stats``
+    """
+
+    class CountingPool(base):
+        conn_stats = None
+
+        def _new_conn(self):
+            conn = super()._new_conn()
+            conn._blog_fresh = True
+            if self.conn_stats:
+                self.conn_stats.record_opened()
+            return conn
+
+        def _make_request(self, conn, *args, **kwargs):
+            if getattr(conn, '_blog_fresh', False):
+                conn._blog_fresh = False
+            elif self.conn_stats:
+                self.conn_stats.record_reused()
+            return super()._make_request(conn, *args, **kwargs)
+
+    CountingPool.__name__ = f"Counting{base.__name__}"
+    return CountingPool
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connection pools count opened and reused connections
+    """
+
+    def __init__(self, conn_stats, **kwargs):
+        self.conn_stats = conn_stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        pool_classes = {}
+        for scheme, base in (('http', HTTPConnectionPool), ('https', HTTPSConnectionPool)):
+            pool_class = _counting_pool(base)
+            pool_class.conn_stats = self.conn_stats
+            pool_classes[scheme] = pool_class
+        self.poolmanager.pool_classes_by_scheme = pool_classes
+
+
+class BlogAPIClient:
+    """
+    Pooled keep-alive client for the upstream blog REST API
+    """
+
+    def __init__(self, **options):
+        self.options = {**api_settings(), **options}
+        self.base_url = self.options['BASE_URL'].rstrip('/')
+        self.stats = ConnectionStats()
+        self.session = self._build_session()
+
+    def _build_session(self):
+        retry = Retry(
+            total=self.options['MAX_RETRIES'],
+            backoff_factor=self.options['BACKOFF_FACTOR'],
+            status_forcelist=self.options['RETRY_STATUSES'],
+            raise_on_status=False,
+        )
+        adapter = CountingHTTPAdapter(
+            self.stats,
+            pool_connections=self.options['POOL_CONNECTIONS'],
+            pool_maxsize=self.options['POOL_MAXSIZE'],
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def url(self, endpoint):
+        """
+        Build the absolute URL of an endpoint such as ``blogs/``
+        """
+        return f"{self.base_url}/{endpoint.lstrip('/')}"
+
+    def timeout_for(self, endpoint):
+        """
+        Return the timeout for an endpoint, honouring the longest matching prefix
+        """
+        return _by_prefix(self.options, 'TIMEOUTS', endpoint, 'TIMEOUT')
+
+    def request(self, method, endpoint, **kwargs):
+        """
+        Send a request to the API; raises ``requests.RequestException`` on
+        failure, or ``breaker.CircuitOpenError`` while the circuit is open
+        """
+        kwargs.setdefault('timeout', self.timeout_for(endpoint))
+        probe = breaker.before_call()
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.url(endpoint), **kwargs)
+        except requests.RequestException as e:
+            breaker.record_failure(probe)
+            elapsed = time.perf_counter() - started
+            instrumentation.upstream_call(elapsed)
+            log_call(self.options, method, endpoint, elapsed=elapsed, error=e)
+            raise
+        elapsed = time.perf_counter() - started
+        instrumentation.upstream_call(elapsed)
+        log_call(
+            self.options, method, endpoint, response.status_code, len(response.content),
+            elapsed, body=lambda: response.text,
+        )
+        if breaker.failed(response):
+            breaker.record_failure(probe)
+        else:
+            breaker.record_success(probe)
+        return response
+
+    def get(self, endpoint, **kwargs):
+        return self.request('GET', endpoint, **kwargs)
+
+    def post(self, endpoint, **kwargs):
+        return self.request('POST', endpoint, **kwargs)
+
+    def put(self, endpoint, **kwargs):
+        return self.request('PUT', endpoint, **kwargs)
+
+    def delete(self, endpoint, **kwargs):
+        return self.request('DELETE', endpoint, **kwargs)
+
+    def upload(self, method, endpoint, data=None, files=None, **kwargs):
+        """
+        Send ``data`` and ``files`` as a multipart body streamed from the open
+        files, instead of ``requests`` reading them into memory first
+        """
+        if not files:
+            return self.request(method, endpoint, data=data, **kwargs)
+        body = MultipartStream(data, files)
+        headers = {**kwargs.pop('headers', {}), 'Content-Type': body.content_type}
+        return self.request(method, endpoint, data=body, headers=headers, **kwargs)
+
+    def get_json(self, endpoint, **kwargs):
+        """
+        GET an endpoint and return the decoded JSON body, or None on any error
+        """
+        try:
+            response = self.get(endpoint, **kwargs)
+            if response.status_code == 200:
+                return response.json()
+        except (requests.RequestException, ValueError):
+            pass
+        return None
+
+    def connection_stats(self):
+        return self.stats.snapshot()
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Return the per-process shared API client, creating it on first use
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = BlogAPIClient()
+    return _client
+
+
+def reset_client():
+    """
+    Close and drop the shared client (e.g. after settings change or fork)
+    """
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+
+
+def send_blog_to_api(blog_instance, image_file=None):
+    """
+    Send blog data to REST API
+    """
+    try:
+        # Prepare data for API
+        data = {
+            'title': blog_instance.title,
+            'slug': blog_instance.slug,
+            'Author_name': blog_instance.Author_name,
+            'content': blog_instance.content,
+            'Category': blog_instance.Category,
+        }
+
+        # Handle image file if present (streamed, not read into memory)
+        files = {}
+        if image_file:
+            image_file.seek(0)
+            files['image'] = (os.path.basename(image_file.name), image_file, image_file.content_type)
+
+        response = get_client().upload('POST', 'blogs/', data=data, files=files)
+
+        # Failed answers were already logged with the call
+        return response.status_code in [200, 201]
+
+    except requests.RequestException:
+        return False
+    except Exception:
+        logger.exception('Sending blog %s to the API failed', blog_instance.slug)
+        return False
+
+
+def fetch_blogs_from_api():
+    """
+    Fetch blogs from REST API, bypassing the cache in ``blog.api_cache``
+    """
+    # The call itself is logged (bodies only at DEBUG) by the client
+    try:
+        response = get_client().get('blogs/')
+        if response.status_code == 200:
+            return response.json()
+        return None
+    except requests.RequestException:
+        return None
+    except ValueError:
+        logger.warning('api GET blogs/ answered invalid JSON')
+        return None
+
+
+def collection_result(response):
+    """
+    ``(status, data, etag, version)`` for a response to ``GET blogs/``.
+
+    ``version`` identifies the content: the upstream ``ETag`` when there is
+    one, otherwise a hash of the body.
+    """
+    etag = response.headers.get('ETag')
+    if response.status_code != 200:
+        return response.status_code, None, etag, None
+    version = etag or hashlib.sha256(response.content).hexdigest()[:32]
+    return 200, response.json(), etag, version
+
+
+def revalidate_blogs_from_api(etag=None):
+    """
+    Fetch the blogs collection, sending ``If-None-Match: etag`` if given.
+
+    Returns ``collection_result()``; a 304 status means the copy tagged
+    ``etag`` is still current, and a None status that the request failed.
+    """
+    headers = {'If-None-Match': etag} if etag else {}
+    try:
+        return collection_result(get_client().get('blogs/', headers=headers))
+    except (requests.RequestException, ValueError):
+        return None, None, None, None
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
+
+    def ready(self):
+        from . import checks  # noqa: F401
+        from . import signals  # noqa: F401
+        from . import tasks  # noqa: F401
@@ -0,0 +1,186 @@
+"""
+Async access to the upstream blog REST API, for the async views.
+
+Under ASGI (``blogsite/asgi.py`` calls ``serve_asgi()``), when ``httpx``
+is installed, requests go through one pooled ``httpx.AsyncClient`` per
+event loop, so a worker can keep many upstream calls in flight and
+fan-out calls can run concurrently with ``asyncio.gather``. Otherwise
+calls fall back to the shared sync client (``blog.api_client``) running
+in worker threads, which still lets the event loop overlap them. That
+includes async views served over WSGI: each of those runs on a fresh,
+short-lived event loop, so a per-loop pool would never be reused. An
+httpx client is closed when its event loop shuts down, or at exit.
+"""
+import asyncio
+import atexit
+import time
+import weakref
+
+import requests
+from asgiref.sync import sync_to_async
+
+from . import breaker, instrumentation
+from .api_client import api_settings, collection_result, get_client, log_call
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+
+async def _close_on_shutdown(client):
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+class AsyncBlogAPIClient:
+    """
+    Pooled async client for the upstream blog REST API
+    """
+
+    def __init__(self, **options):
+        self.options = {**api_settings(), **options}
+        self.base_url = self.options['BASE_URL'].rstrip('/')
+        # httpx clients are bound to the loop that created them
+        self._clients = weakref.WeakKeyDictionary()
+
+    def url(self, endpoint):
+        return f"{self.base_url}/{endpoint.lstrip('/')}"
+
+    async def _client(self):
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(loop)
+        if entry is None:
+            limits = httpx.Limits(
+                max_connections=self.options['POOL_MAXSIZE'],
+                max_keepalive_connections=self.options['POOL_MAXSIZE'],
+            )
+            transport = httpx.AsyncHTTPTransport(limits=limits, retries=self.options['MAX_RETRIES'])
+            client = httpx.AsyncClient(transport=transport)
+            # The loop finalizes its async generators (shutdown_asyncgens)
+            # before closing, which closes the client while it still can
+            holder = _close_on_shutdown(client)
+            entry = self._clients[loop] = (client, holder)
+            await holder.__anext__()
+        return entry[0]
+
+    def close(self):
+        """
+        Close the httpx clients of event loops that are stopped but not closed
+        """
+        for loop, (client, holder) in list(self._clients.items()):
+            if loop.is_running():
+                continue
+            del self._clients[loop]
+            if not loop.is_closed():
+                loop.run_until_complete(holder.aclose())
+
+    async def request(self, method, endpoint, **kwargs):
+        """
+        Send a request to the API; raises ``requests.RequestException`` on failure
+        """
+        if httpx is None or not _asgi:
+            sync_request = sync_to_async(get_client().request, thread_sensitive=False)
+            return await sync_request(method, endpoint, **kwargs)
+
+        kwargs.setdefault('timeout', get_client().timeout_for(endpoint))
+        probe = await breaker.abefore_call()
+        started = time.perf_counter()
+        try:
+            response = await (await self._client()).request(method, self.url(endpoint), **kwargs)
+        except httpx.HTTPError as e:
+            await breaker.arecord_failure(probe)
+            elapsed = time.perf_counter() - started
+            instrumentation.upstream_call(elapsed)
+            log_call(self.options, method, endpoint, elapsed=elapsed, error=e)
+            # Callers handle upstream failures as requests exceptions
+            raise requests.RequestException(str(e)) from e
+        elapsed = time.perf_counter() - started
+        instrumentation.upstream_call(elapsed)
+        log_call(
+            self.options, method, endpoint, response.status_code, len(response.content),
+            elapsed, body=lambda: response.text,
+        )
+        if breaker.failed(response):
+            await breaker.arecord_failure(probe)
+        else:
+            await breaker.arecord_success(probe)
+        return response
+
+    async def get(self, endpoint, **kwargs):
+        return await self.request('GET', endpoint, **kwargs)
+
+    async def get_json(self, endpoint, **kwargs):
+        """
+        GET an endpoint and return the decoded JSON body, or None on any error
+        """
+        try:
+            response = await self.get(endpoint, **kwargs)
+            if response.status_code == 200:
+                return response.json()
+        except (requests.RequestException, ValueError):
+            pass
+        return None
+
+
+_client = None
+_asgi = False
+
+
+def serve_asgi():
+    """
+    Use per-loop httpx pools: under ASGI a worker's event loop lives as long as it does
+    """
+    global _asgi
+    _asgi = True
+
+
+def get_async_client():
+    """
+    Return the per-process shared async API client
+    """
+    global _client
+    if _client is None:
+        _client = AsyncBlogAPIClient()
+    return _client
+
+
+def reset_async_client():
+    """
+    Drop the shared async client (e.g. after settings change)
+    """
+    global _client
+    if _client is not None:
+        _client.close()
+    _client = None
+
+
+atexit.register(reset_async_client)
+
+
+async def afetch_blogs_from_api():
+    """
+    Fetch blogs from REST API without the cache (async)
+    """
+    return await get_async_client().get_json('blogs/')
+
+
+async def arevalidate_blogs_from_api(etag=None):
+    """
+    Async counterpart of ``api_client.revalidate_blogs_from_api()``
+    """
+    headers = {'If-None-Match': etag} if etag else {}
+    try:
+        return collection_result(await get_async_client().get('blogs/', headers=headers))
+    except (requests.RequestException, ValueError):
+        return None, None, None, None
+
+
+async def gather_json(*endpoints, **kwargs):
+    """
+    GET several endpoints concurrently and return their JSON bodies in order
+    """
+    client = get_async_client()
+    return await asyncio.gather(*(client.get_json(endpoint, **kwargs) for endpoint in endpoints))
@@ -0,0 +1,179 @@
+"""
+Circuit breaker for the upstream blog REST API.
+
+Every request sent through ``blog.api_client`` or ``blog.async_api`` asks
+the breaker first. After ``BREAKER_FAILURES`` failures (connection
+errors, timeouts, 5xx answers) within ``BREAKER_WINDOW`` seconds the
+circuit *opens*: calls fail at once with ``CircuitOpenError`` instead of
+waiting out a timeout, and views fall back to the cached snapshot or the
+local ``create_blog`` table. ``BREAKER_RESET_TIMEOUT`` seconds later it
+is *half-open*: a single request goes through as a probe, and closes the
+circuit if it succeeds or opens it again if it fails.
+
+The state lives in the API cache (``BLOG_API['CACHE_ALIAS']``), so with a
+shared backend every worker trips and recovers together. It is exported
+as the ``blog_api_circuit_state`` metric.
+"""
+import time
+
+import requests
+from django.core.cache import caches
+
+from . import metrics
+
+CLOSED = 'closed'
+HALF_OPEN = 'half-open'
+OPEN = 'open'
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+OPENED_KEY = 'blog:api:breaker:opened'
+FAILURES_KEY = 'blog:api:breaker:failures'
+PROBE_KEY = 'blog:api:breaker:probe'
+
+circuit_state = metrics.gauge(
+    'blog_api_circuit_state', 'Upstream API circuit breaker state (0 closed, 1 half-open, 2 open)',
+)
+circuit_rejected = metrics.counter(
+    'blog_api_circuit_rejected_total', 'Upstream API calls refused without trying while the circuit was open',
+)
+circuit_opened = metrics.counter(
+    'blog_api_circuit_opened_total', 'Times this process opened the upstream API circuit',
+)
+
+
+class CircuitOpenError(requests.RequestException):
+    """
+    Raised instead of calling the upstream API while the circuit is open
+    """
+
+
+def _options():
+    from .api_client import api_settings
+
+    return api_settings()
+
+
+def _cache(options):
+    return caches[options['CACHE_ALIAS']]
+
+
+def _state(opened, options):
+    if opened is None:
+        return CLOSED
+    if time.time() - opened < options['BREAKER_RESET_TIMEOUT']:
+        return OPEN
+    return HALF_OPEN
+
+
+def state():
+    """
+    The current state: ``'closed'``, ``'half-open'`` or ``'open'``
+    """
+    options = _options()
+    current = _state(_cache(options).get(OPENED_KEY), options)
+    circuit_state.set(STATE_VALUES[current])
+    return current
+
+
+def _refuse():
+    circuit_rejected.inc()
+    raise CircuitOpenError('Upstream API circuit is open; not calling it')
+
+
+def before_call():
+    """
+    Raise ``CircuitOpenError`` unless a call may go upstream now.
+
+    Returns True when the call is the half-open probe, which has to be
+    reported to ``record_success()`` / ``record_failure()``.
+    """
+    options = _options()
+    cache = _cache(options)
+    current = _state(cache.get(OPENED_KEY), options)
+    circuit_state.set(STATE_VALUES[current])
+    if current == CLOSED:
+        return False
+    if current == HALF_OPEN and cache.add(PROBE_KEY, 1, options['BREAKER_RESET_TIMEOUT']):
+        return True
+    _refuse()
+
+
+def record_success(probe=False):
+    if probe:
+        options = _options()
+        _cache(options).delete_many([OPENED_KEY, FAILURES_KEY, PROBE_KEY])
+        circuit_state.set(STATE_VALUES[CLOSED])
+
+
+def record_failure(probe=False):
+    options = _options()
+    cache = _cache(options)
+    if not probe:
+        cache.add(FAILURES_KEY, 0, options['BREAKER_WINDOW'])
+        try:
+            failures = cache.incr(FAILURES_KEY)
+        except ValueError:
+            # Expired between add() and incr()
+            cache.set(FAILURES_KEY, 1, options['BREAKER_WINDOW'])
+            failures = 1
+        if failures < options['BREAKER_FAILURES'] or not cache.add(OPENED_KEY, time.time(), None):
+            return
+    else:
+        # The probe failed: stay open for another reset timeout
+        cache.set(OPENED_KEY, time.time(), None)
+        cache.delete_many([FAILURES_KEY, PROBE_KEY])
+    circuit_opened.inc()
+    circuit_state.set(STATE_VALUES[OPEN])
+
+
+async def abefore_call():
+    """
+    Async counterpart of ``before_call()``
+    """
+    options = _options()
+    cache = _cache(options)
+    current = _state(await cache.aget(OPENED_KEY), options)
+    circuit_state.set(STATE_VALUES[current])
+    if current == CLOSED:
+        return False
+    if current == HALF_OPEN and await cache.aadd(PROBE_KEY, 1, options['BREAKER_RESET_TIMEOUT']):
+        return True
+    _refuse()
+
+
+async def arecord_success(probe=False):
+    if probe:
+        options = _options()
+        await _cache(options).adelete_many([OPENED_KEY, FAILURES_KEY, PROBE_KEY])
+        circuit_state.set(STATE_VALUES[CLOSED])
+
+
+async def arecord_failure(probe=False):
+    options = _options()
+    cache = _cache(options)
+    if not probe:
+        await cache.aadd(FAILURES_KEY, 0, options['BREAKER_WINDOW'])
+        try:
+            failures = await cache.aincr(FAILURES_KEY)
+        except ValueError:
+            await cache.aset(FAILURES_KEY, 1, options['BREAKER_WINDOW'])
+            failures = 1
+        if failures < options['BREAKER_FAILURES'] or not await cache.aadd(OPENED_KEY, time.time(), None):
+            return
+    else:
+        await cache.aset(OPENED_KEY, time.time(), None)
+        await cache.adelete_many([FAILURES_KEY, PROBE_KEY])
+    circuit_opened.inc()
+    circuit_state.set(STATE_VALUES[OPEN])
+
+
+def failed(response):
+    """
+    Whether an upstream response counts against the circuit
+    """
+    return response.status_code >= 500
+
+
+# Scrapes report the shared state, not just what this process last saw
+metrics.on_collect(state)
@@ -0,0 +1,36 @@
+"""
+System checks for the blog app's deployment settings.
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from .api_client import api_settings
+from .page_cache import page_cache_settings
+
+LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Warn when state shared between processes lives in a per-process cache
+    """
+    options = page_cache_settings()
+    aliases = {'default', api_settings()['CACHE_ALIAS'], options['CACHE_ALIAS'], options['GENERATION_CACHE_ALIAS']}
+    errors = []
+    for alias in sorted(aliases):
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend in LOCAL_BACKENDS:
+            errors.append(Warning(
+                f"CACHES['{alias}'] uses {backend.rsplit('.', 1)[-1]}, which is not shared between processes.",
+                hint=(
+                    'Circuit breaker state, page cache and search generations and the mirror '
+                    'ready flag would not reach other web workers, run_workers or sync_mirror. '
+                    'Use FileBasedCache, DatabaseCache or Redis.'
+                ),
+                id='blog.W001',
+            ))
+    return errors
@@ -1,4 +1,6 @@
 from django import forms
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
 from .models import create_blog
 
 class BlogForm(forms.ModelForm):
@@ -39,3 +41,12 @@ class BlogForm(forms.ModelForm):
             'image': 'Blog Image',
             'Category': 'Category',
         }
+
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        max_size = getattr(settings, 'BLOG_MAX_UPLOAD_SIZE', 10 * 1024 * 1024)
+        if image and getattr(image, 'size', 0) > max_size:
+            raise forms.ValidationError(
+                f'Image is too large ({filesizeformat(image.size)}); the limit is {filesizeformat(max_size)}.'
+            )
+        return image
@@ -0,0 +1,146 @@
+"""
+SQLite FTS5 full-text search over ``create_blog``.
+
+``blog_create_blog_fts`` is an external-content FTS5 table over the title,
+content and Author_name columns, kept in sync by SQL triggers so bulk
+writes and raw SQL are covered too. Django rebuilds SQLite tables when a
+migration alters them (which drops their triggers), so ``install()`` is
+idempotent and also runs after every ``migrate``.
+"""
+import re
+
+from django.db import connection
+
+FTS_TABLE = 'blog_create_blog_fts'
+SOURCE_TABLE = 'blog_create_blog'
+COLUMNS = ('title', 'content', 'Author_name')
+
+# bm25() column weights, in COLUMNS order: title > author > body
+BM25_WEIGHTS = (10.0, 1.0, 5.0)
+
+TOKEN_RE = re.compile(r'\w+')
+
+_columns = ', '.join(COLUMNS)
+_new_values = ', '.join(f'new.{column}' for column in COLUMNS)
+_old_values = ', '.join(f'old.{column}' for column in COLUMNS)
+
+INSTALL_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_columns}, content='{SOURCE_TABLE}', content_rowid='id'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {SOURCE_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {SOURCE_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {SOURCE_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+        INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END""",
+]
+
+UNINSTALL_SQL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+_available = None
+
+
+def supported(conn=None):
+    return (conn or connection).vendor == 'sqlite'
+
+
+def install(conn=None):
+    """
+    Create the FTS table and its triggers if they don't exist yet
+    """
+    conn = conn or connection
+    if not supported(conn):
+        return False
+    with conn.cursor() as cursor:
+        for statement in INSTALL_SQL:
+            cursor.execute(statement)
+    return True
+
+
+def uninstall(conn=None):
+    conn = conn or connection
+    if not supported(conn):
+        return
+    with conn.cursor() as cursor:
+        for statement in UNINSTALL_SQL:
+            cursor.execute(statement)
+
+
+def available():
+    """
+    Whether the FTS table exists on the default database (checked once)
+    """
+    global _available
+    if _available is None:
+        _available = supported() and FTS_TABLE in connection.introspection.table_names()
+    return _available
+
+
+def match_expression(query):
+    """
+    Turn free text into a safe FTS5 query: every word, as a prefix, ANDed
+    """
+    return ' '.join(f'"{token}"*' for token in TOKEN_RE.findall(query.lower()))
+
+
+def search_queryset(queryset, query):
+    """
+    Filter ``queryset`` to posts matching ``query``, ordered by bm25 rank
+    """
+    from django.db.models.expressions import RawSQL
+
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    # Join the FTS table once: MATCH runs a single time and bm25() is read
+    # from the joined row, instead of a MATCH subquery per result row
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = {SOURCE_TABLE}.id', f'{FTS_TABLE} MATCH %s'],
+        params=[expression],
+    ).annotate(rank=RawSQL(f'bm25({FTS_TABLE}, {weights})', [])).order_by('rank', '-date')
+
+
+def rebuild(batch_size=1000, stdout=None):
+    """
+    Repopulate the FTS table from ``create_blog`` in batches of ``batch_size`` rows
+    """
+    from django.db import transaction
+
+    install()
+    total = 0
+    last_id = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')")
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT id FROM {SOURCE_TABLE} WHERE id > %s ORDER BY id LIMIT %s',
+                [last_id, batch_size],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+            if not ids:
+                break
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE}(rowid, {_columns}) '
+                f'SELECT id, {_columns} FROM {SOURCE_TABLE} WHERE id >= %s AND id <= %s',
+                [ids[0], ids[-1]],
+            )
+        total += len(ids)
+        last_id = ids[-1]
+        if stdout:
+            stdout.write(f'Indexed {total} posts')
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return total
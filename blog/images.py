@@ -0,0 +1,153 @@
+"""
+Resized and WebP derivatives of ``create_blog.image``.
+
+Each post image gets a card, detail and hero size, each in the source
+format and in WebP, written once by a background job (``blog.tasks``) or
+``manage.py build_image_variants``. Files live under
+``blog/derived/<content hash>/`` so a URL never changes meaning and can
+be cached forever, and identical uploads share their derivatives. What
+was generated is recorded in ``create_blog.image_variants``::
+
+    {'source': 'blog/images/photo.jpg', 'hash': '3f9c...',
+     'width': 3000, 'height': 2000,
+     'variants': {'card': {'width': 480, 'height': 320,
+                           'jpeg': 'blog/derived/3f9c.../card.jpg',
+                           'webp': 'blog/derived/3f9c.../card.webp'}, ...}}
+
+Templates render them through the ``blog_images`` template tags.
+"""
+import hashlib
+import io
+import posixpath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from PIL import Image, ImageOps
+
+DERIVED_ROOT = 'blog/derived'
+
+# Target widths; images are never upscaled
+SIZES = {
+    'card': 480,
+    'detail': 960,
+    'hero': 1600,
+}
+
+QUALITY = 82
+WEBP_QUALITY = 78
+
+_FORMATS = {
+    'JPEG': ('jpeg', 'jpg'),
+    'PNG': ('png', 'png'),
+}
+
+
+def content_hash(fileobj):
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(64 * 1024), b''):
+        digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _encode(image, name, format):
+    if default_storage.exists(name):
+        # Same content hash, same bytes: another post already made it
+        return name
+    buffer = io.BytesIO()
+    if format == 'JPEG':
+        image.convert('RGB').save(buffer, 'JPEG', quality=QUALITY, optimize=True, progressive=True)
+    elif format == 'WEBP':
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+    else:
+        image.save(buffer, 'PNG', optimize=True)
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def build_variants(field):
+    """
+    Generate every derivative of an ``ImageFieldFile`` and return the
+    ``image_variants`` mapping for it
+    """
+    with field.storage.open(field.name, 'rb') as source:
+        digest = content_hash(source)
+        source.seek(0)
+        with Image.open(source) as original:
+            original.load()
+    # Apply the camera's EXIF rotation before resizing
+    image = ImageOps.exif_transpose(original)
+    source_format = 'PNG' if original.format == 'PNG' else 'JPEG'
+    if source_format == 'PNG':
+        transparent = 'A' in image.getbands() or 'transparency' in image.info
+        image = image.convert('RGBA' if transparent else 'RGB')
+    else:
+        image = image.convert('RGB')
+
+    folder = posixpath.join(DERIVED_ROOT, digest)
+    variants = {}
+    for size, width in SIZES.items():
+        if width < image.width:
+            height = round(image.height * width / image.width)
+            resized = image.resize((width, height), Image.LANCZOS)
+        else:
+            resized = image
+        key, ext = _FORMATS[source_format]
+        variants[size] = {
+            'width': resized.width,
+            'height': resized.height,
+            key: _encode(resized, posixpath.join(folder, f'{size}.{ext}'), source_format),
+            'webp': _encode(resized, posixpath.join(folder, f'{size}.webp'), 'WEBP'),
+        }
+    return {
+        'source': field.name,
+        'hash': digest,
+        'width': image.width,
+        'height': image.height,
+        'variants': variants,
+    }
+
+
+def needs_variants(blog):
+    """
+    Whether ``blog`` has an image whose derivatives are missing or stale
+    """
+    return bool(blog.image) and (blog.image_variants or {}).get('source') != blog.image.name
+
+
+def update_variants(blog):
+    """
+    Build derivatives for ``blog`` and store them without firing ``post_save``.
+
+    ``updated_at`` is bumped and the post's cached pages retired by hand, so
+    pages and ``{% cache %}`` cards pick up the new markup.
+    """
+    from .models import create_blog
+    from .page_cache import invalidate_pages
+
+    variants = build_variants(blog.image)
+    now = timezone.now()
+    updated = create_blog.objects.filter(pk=blog.pk, image=variants['source']).update(
+        image_variants=variants, updated_at=now,
+    )
+    blog.image_variants = variants
+    if updated:
+        blog.updated_at = now
+        invalidate_pages(slugs=[blog.slug], categories=[blog.Category])
+    return variants
+
+
+def variant_urls(variants, format=None):
+    """
+    ``[(url, width, height), ...]`` for each size of one format, smallest first.
+    ``format`` is ``'webp'`` or None for the source format.
+    """
+    urls = []
+    widths = set()
+    for size in sorted(variants.get('variants', {}).values(), key=lambda item: item['width']):
+        name = size.get(format) if format else size.get('jpeg') or size.get('png')
+        # Small sources give several sizes of the same width
+        if name and size['width'] not in widths:
+            widths.add(size['width'])
+            urls.append((default_storage.url(name), size['width'], size['height']))
+    return urls
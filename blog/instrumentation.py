@@ -0,0 +1,251 @@
+"""
+Per-request performance instrumentation.
+
+``RequestTimingMiddleware`` records, for every request, the database
+queries (count and time), upstream API calls (count and time, reported
+by ``blog.api_client`` / ``blog.async_api`` through ``upstream_call()``),
+template rendering time and the total. The numbers are
+
+* sent back in a ``Server-Timing`` header when
+  ``BLOG_INSTRUMENTATION['SERVER_TIMING']`` is on (browser dev tools show
+  them next to the request);
+* aggregated per view into the ``blog_request_*`` histograms served at
+  ``/metrics/``;
+* logged with the captured SQL on the ``blog.requests`` logger when a
+  request takes longer than ``SLOW_REQUEST_MS``.
+
+The current request's numbers live in a context variable, which asgiref
+carries into ``sync_to_async`` threads, so queries and upstream calls
+made on behalf of async views are counted too.
+"""
+import contextvars
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from . import metrics
+
+DEFAULTS = {
+    'SERVER_TIMING': False,
+    # Requests slower than this are logged with their queries; None disables it
+    'SLOW_REQUEST_MS': 1000,
+    # Queries kept per request for the slow-request log
+    'MAX_CAPTURED_QUERIES': 50,
+}
+
+logger = logging.getLogger('blog.requests')
+
+_current = contextvars.ContextVar('blog_request_timing', default=None)
+
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+request_duration = metrics.histogram(
+    'blog_request_duration_seconds', 'Time spent handling requests', ['view'],
+)
+request_db_seconds = metrics.histogram(
+    'blog_request_db_seconds', 'Time spent in database queries per request', ['view'],
+)
+request_db_queries = metrics.histogram(
+    'blog_request_db_queries', 'Database queries per request', ['view'], buckets=QUERY_BUCKETS,
+)
+request_upstream_seconds = metrics.histogram(
+    'blog_request_upstream_seconds', 'Time spent in upstream API calls per request', ['view'],
+)
+request_upstream_calls = metrics.histogram(
+    'blog_request_upstream_calls', 'Upstream API calls per request', ['view'], buckets=QUERY_BUCKETS,
+)
+request_template_seconds = metrics.histogram(
+    'blog_request_template_seconds', 'Time spent rendering templates per request', ['view'],
+)
+
+
+def instrumentation_settings():
+    return {**DEFAULTS, **getattr(settings, 'BLOG_INSTRUMENTATION', {})}
+
+
+class RequestTiming:
+    """
+    What one request spent where; updated from any thread serving it
+    """
+
+    def __init__(self, max_queries):
+        self._lock = threading.Lock()
+        self.max_queries = max_queries
+        self.started = time.perf_counter()
+        self.db_count = 0
+        self.db_time = 0.0
+        self.queries = []
+        self.upstream_count = 0
+        self.upstream_time = 0.0
+        self.template_time = 0.0
+        # Nesting of template renders ({% include %}, ...) per thread
+        self.template_depth = threading.local()
+
+    def add_query(self, sql, elapsed):
+        with self._lock:
+            self.db_count += 1
+            self.db_time += elapsed
+            if len(self.queries) < self.max_queries:
+                self.queries.append((sql, elapsed))
+
+    def add_upstream(self, elapsed):
+        with self._lock:
+            self.upstream_count += 1
+            self.upstream_time += elapsed
+
+    def add_template(self, elapsed):
+        with self._lock:
+            self.template_time += elapsed
+
+    def server_timing(self, total):
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_count} queries"',
+            f'upstream;dur={self.upstream_time * 1000:.1f};desc="{self.upstream_count} calls"',
+            f'tpl;dur={self.template_time * 1000:.1f};desc="templates"',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+
+def upstream_call(elapsed):
+    """
+    Count an upstream API call against the current request, if any
+    """
+    timing = _current.get()
+    if timing is not None:
+        timing.add_upstream(elapsed)
+
+
+def _record_query(execute, sql, params, many, context):
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.add_query(sql, time.perf_counter() - started)
+
+
+def _instrument_connection(connection):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _instrument_connection(connection)
+
+
+def _timed_render(render):
+    def wrapper(self, context):
+        timing = _current.get()
+        if timing is None:
+            return render(self, context)
+        depth = getattr(timing.template_depth, 'value', 0)
+        timing.template_depth.value = depth + 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            timing.template_depth.value = depth
+            if depth == 0:
+                # Included templates are part of their parent's time
+                timing.add_template(time.perf_counter() - started)
+
+    wrapper.instrumented = True
+    return wrapper
+
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def install():
+    """
+    Hook database connections and template rendering; safe to call twice
+    """
+    global _installed
+    from django.template.base import Template
+
+    with _install_lock:
+        if _installed:
+            return
+        connection_created.connect(_on_connection_created, dispatch_uid='blog.instrumentation')
+        for connection in connections.all(initialized_only=True):
+            _instrument_connection(connection)
+        if not getattr(Template.render, 'instrumented', False):
+            Template.render = _timed_render(Template.render)
+        _installed = True
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or 'unnamed'
+
+
+class RequestTimingMiddleware:
+    """
+    Time each request's database, upstream and template work (see module docs)
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        options = instrumentation_settings()
+        timing = RequestTiming(options['MAX_CAPTURED_QUERIES'])
+        token = _current.set(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timing, options)
+
+    async def __acall__(self, request):
+        options = instrumentation_settings()
+        timing = RequestTiming(options['MAX_CAPTURED_QUERIES'])
+        token = _current.set(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timing, options)
+
+    def _finish(self, request, response, timing, options):
+        total = time.perf_counter() - timing.started
+        view = _view_name(request)
+        request_duration.observe(total, view=view)
+        request_db_seconds.observe(timing.db_time, view=view)
+        request_db_queries.observe(timing.db_count, view=view)
+        request_upstream_seconds.observe(timing.upstream_time, view=view)
+        request_upstream_calls.observe(timing.upstream_count, view=view)
+        request_template_seconds.observe(timing.template_time, view=view)
+
+        if options['SERVER_TIMING']:
+            response['Server-Timing'] = timing.server_timing(total)
+
+        slow_ms = options['SLOW_REQUEST_MS']
+        if slow_ms is not None and total * 1000 >= slow_ms:
+            queries = ''.join(f'\n  {elapsed * 1000:.1f} ms  {sql}' for sql, elapsed in timing.queries)
+            logger.warning(
+                'Slow request %s %s (%s): %.1f ms total, %s queries in %.1f ms, '
+                '%s upstream calls in %.1f ms, templates %.1f ms%s',
+                request.method, request.path, view, total * 1000,
+                timing.db_count, timing.db_time * 1000,
+                timing.upstream_count, timing.upstream_time * 1000,
+                timing.template_time * 1000, queries,
+            )
+        return response
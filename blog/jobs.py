@@ -0,0 +1,198 @@
+"""
+Database-backed background jobs.
+
+Views call ``enqueue()`` to store a ``Job`` row and return straight away;
+``manage.py run_workers`` runs worker processes that claim due jobs and
+call the task registered under the job's name with ``@task``.
+
+Claiming is an optimistic conditional ``UPDATE ... WHERE status =
+'queued'``, so it works on SQLite (which has no ``SELECT ... FOR UPDATE
+SKIP LOCKED``) and on server databases alike: only the worker whose
+update touched the row runs the job. A failed job is retried with
+exponential backoff and ends up ``dead`` after ``max_attempts``, when
+the task's ``on_dead`` hook (if any) gets to clean up after it. Jobs
+left ``running`` by a worker that died are requeued once their lock is
+older than ``BLOG_JOBS['LOCK_TIMEOUT']``.
+"""
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'MAX_ATTEMPTS': 5,
+    # Retry n waits BACKOFF_BASE * 2 ** (n - 1) seconds, up to BACKOFF_MAX
+    'BACKOFF_BASE': 5,
+    'BACKOFF_MAX': 600,
+    'POLL_INTERVAL': 1.0,
+    'LOCK_TIMEOUT': 600,
+}
+
+_tasks = {}
+_dead_hooks = {}
+
+
+def job_settings():
+    return {**DEFAULTS, **getattr(settings, 'BLOG_JOBS', {})}
+
+
+def task(name, on_dead=None):
+    """
+    Register a function as the task run for jobs named ``name``.
+
+    ``on_dead(**payload)`` is called once a job has run out of attempts.
+    """
+    def register(func):
+        _tasks[name] = func
+        if on_dead is not None:
+            _dead_hooks[name] = on_dead
+        return func
+    return register
+
+
+def registered_tasks():
+    return dict(_tasks)
+
+
+def enqueue(name, payload=None, delay=0, max_attempts=None):
+    """
+    Queue ``name`` to run with ``payload`` (a JSON-serializable dict) and return the ``Job``
+    """
+    if name not in _tasks:
+        raise KeyError(f'Unknown task: {name}')
+    return Job.objects.create(
+        task=name,
+        payload=payload or {},
+        max_attempts=max_attempts or job_settings()['MAX_ATTEMPTS'],
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def backoff(attempts):
+    options = job_settings()
+    return min(options['BACKOFF_BASE'] * 2 ** max(attempts - 1, 0), options['BACKOFF_MAX'])
+
+
+def requeue_stale():
+    """
+    Requeue jobs whose worker stopped while running them
+    """
+    cutoff = timezone.now() - timedelta(seconds=job_settings()['LOCK_TIMEOUT'])
+    return Job.objects.filter(status=Job.STATUS_RUNNING, locked_at__lt=cutoff).update(
+        status=Job.STATUS_QUEUED, locked_by='', locked_at=None,
+    )
+
+
+def claim(worker_name, candidates=10):
+    """
+    Claim the next due job for ``worker_name``, or return None when nothing is due
+    """
+    now = timezone.now()
+    due = (
+        Job.objects.filter(status=Job.STATUS_QUEUED, run_at__lte=now)
+        .order_by('run_at', 'id')
+        .values_list('id', flat=True)[:candidates]
+    )
+    for job_id in due:
+        claimed = Job.objects.filter(pk=job_id, status=Job.STATUS_QUEUED).update(
+            status=Job.STATUS_RUNNING,
+            locked_by=worker_name,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+        # Another worker got there first; try the next candidate
+    return None
+
+
+def run_job(job):
+    """
+    Run a claimed job and record the outcome: done, queued for a retry, or dead
+    """
+    func = _tasks.get(job.task)
+    try:
+        if func is None:
+            raise KeyError(f'Unknown task: {job.task}')
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if func is not None and job.attempts < job.max_attempts:
+            delay = backoff(job.attempts)
+            logger.warning('Job %s (%s) failed, retrying in %ss', job.pk, job.task, delay)
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.STATUS_QUEUED,
+                run_at=timezone.now() + timedelta(seconds=delay),
+                locked_by='',
+                locked_at=None,
+                last_error=error,
+            )
+        else:
+            logger.error('Job %s (%s) is dead after %s attempts', job.pk, job.task, job.attempts)
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.STATUS_DEAD,
+                locked_by='',
+                locked_at=None,
+                last_error=error,
+                finished_at=timezone.now(),
+            )
+            on_dead = _dead_hooks.get(job.task)
+            if on_dead is not None:
+                try:
+                    on_dead(**job.payload)
+                except Exception:
+                    logger.exception('Cleaning up dead job %s (%s) failed', job.pk, job.task)
+        return False
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.STATUS_DONE, locked_by='', locked_at=None, finished_at=timezone.now(),
+    )
+    return True
+
+
+def retry(queryset):
+    """
+    Put dead (or finished) jobs back in the queue with a fresh set of attempts
+    """
+    return queryset.exclude(status=Job.STATUS_RUNNING).update(
+        status=Job.STATUS_QUEUED, attempts=0, run_at=timezone.now(), finished_at=None,
+    )
+
+
+def worker_name(index=0):
+    return f'{socket.gethostname()}:{os.getpid()}:{index}'
+
+
+def run_worker(index=0, burst=False, poll_interval=None, stop=None):
+    """
+    Claim and run jobs until ``stop()`` returns true, or, with ``burst``,
+    until no job is due. Returns the number of jobs run.
+    """
+    name = worker_name(index)
+    poll_interval = job_settings()['POLL_INTERVAL'] if poll_interval is None else poll_interval
+    processed = 0
+    last_stale_check = 0
+    while not (stop and stop()):
+        close_old_connections()
+        if time.monotonic() - last_stale_check > 60:
+            requeue_stale()
+            last_stale_check = time.monotonic()
+        job = claim(name)
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
+    return processed
@@ -0,0 +1,278 @@
+"""
+Helpers shared by the benchmark management commands.
+
+Benchmarks run against a throwaway test database created with the same
+machinery as ``manage.py test``, so they never touch real data.
+"""
+import hashlib
+import json
+import math
+import random
+import resource
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import timedelta
+from urllib.parse import parse_qs, urlsplit
+
+from django.db import connection
+from django.utils import timezone
+
+
+@contextmanager
+def temporary_database(verbosity=0, test_name=None):
+    """
+    Create and migrate a test database, and destroy it afterwards.
+
+    ``test_name`` overrides the test database name, e.g. a file instead of
+    SQLite's in-memory database, which can't take concurrent writers.
+    """
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    old_test_name = test_settings.get('NAME')
+    if test_name is not None:
+        test_settings['NAME'] = test_name
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        test_settings['NAME'] = old_test_name
+
+
+def seed_posts(count, batch_size=5000, content_words=60, image='', stdout=None):
+    """
+    Bulk-insert ``count`` posts spread over every category and a year of dates
+    """
+    from blog.models import create_blog
+
+    categories = [key for key, _ in create_blog.typeofblog]
+    now = timezone.now()
+    body = ' '.join(f'word{i % 97}' for i in range(content_words))
+    created = 0
+    while created < count:
+        batch = []
+        for i in range(created, min(created + batch_size, count)):
+            batch.append(create_blog(
+                title=f'Benchmark post {i}',
+                slug=f'benchmark-post-{i}',
+                Author_name=f'Author {i % 50}',
+                date=now - timedelta(minutes=i * 5),
+                content=f'{body} post{i}',
+                image=image,
+                Category=categories[i % len(categories)],
+            ))
+        create_blog.objects.bulk_create(batch)
+        created += len(batch)
+        if stdout:
+            stdout.write(f'Seeded {created}/{count} posts')
+    return created
+
+
+def time_call(func, repeat=5):
+    """
+    Run ``func`` ``repeat`` times and return the median wall time in milliseconds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def peak_rss_kb():
+    """
+    Peak resident set size of this process so far, in KiB
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux KiB
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+class _SinkHandler(BaseHTTPRequestHandler):
+    """
+    Accepts any request, drains the body in chunks and answers 201
+    """
+
+    def _drain(self):
+        remaining = int(self.headers.get('Content-Length') or 0)
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 64 * 1024))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+        self.send_response(201)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    do_POST = do_PUT = _drain
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def sink_server():
+    """
+    Run a local HTTP server that swallows request bodies; yields its base URL
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _SinkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def percentile(values, fraction):
+    """
+    The ``fraction`` (0-1) percentile of ``values``, by nearest rank
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+class _APIHandler(BaseHTTPRequestHandler):
+    """
+    Answers the ``/Api/V1/`` endpoints the site uses from ``server.posts``
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def _send(self, status, body=b'', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status, data, headers=None):
+        self._send(status, json.dumps(data).encode(), headers)
+
+    def _delay(self):
+        # Returns True when this request should fail
+        server = self.server
+        with server.lock:
+            server.calls += 1
+        if server.latency:
+            time.sleep(server.latency)
+        if server.failure_rate and random.random() < server.failure_rate:
+            with server.lock:
+                server.failures += 1
+            self._json(503, {'detail': 'Injected failure'})
+            return True
+        return False
+
+    def _endpoint(self):
+        parts = urlsplit(self.path)
+        return parts.path.split('/Api/V1/', 1)[-1], {key: values[-1] for key, values in parse_qs(parts.query).items()}
+
+    def do_GET(self):
+        if self._delay():
+            return
+        server = self.server
+        endpoint, query = self._endpoint()
+        if endpoint.startswith('blogs/slug/'):
+            post = server.by_slug.get(endpoint[len('blogs/slug/'):].strip('/'))
+            if post is None:
+                return self._json(404, {'detail': 'Not found.'})
+            return self._json(200, post)
+        if endpoint == 'blogs/':
+            if not query:
+                if self.headers.get('If-None-Match') == server.etag:
+                    return self._send(304, headers={'ETag': server.etag})
+                return self._send(200, server.collection, {'ETag': server.etag})
+            posts = server.posts
+            if query.get('since'):
+                posts = [post for post in posts if post['updated_at'] > query['since']]
+            if query.get('category'):
+                posts = [post for post in posts if post['Category'] == query['category'].lower()]
+            if query.get('search'):
+                posts = [post for post in posts if query['search'].lower() in post['title'].lower()]
+            page, size = int(query.get('page', 1)), int(query.get('page_size', 100))
+            start = (page - 1) * size
+            if page > 1 and start >= len(posts):
+                return self._json(404, {'detail': 'Invalid page.'})
+            more = start + size < len(posts)
+            return self._json(200, {
+                'count': len(posts),
+                'next': f'?page={page + 1}' if more else None,
+                'previous': f'?page={page - 1}' if page > 1 else None,
+                'results': posts[start:start + size],
+            })
+        if endpoint == 'categories/':
+            return self._json(200, sorted({post['Category'] for post in server.posts}))
+        if endpoint == 'stats/':
+            return self._json(200, {'total': len(server.posts)})
+        self._json(404, {'detail': 'Not found.'})
+
+    def _write(self):
+        remaining = int(self.headers.get('Content-Length') or 0)
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                self.rfile.read(size + 2)
+                if not size:
+                    break
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 64 * 1024))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+        if self._delay():
+            return
+        with self.server.lock:
+            self.server.next_id += 1
+            new_id = self.server.next_id
+        self._json(201, {'id': new_id, 'slug': f'upstream-{new_id}'})
+
+    do_POST = do_PUT = _write
+
+    def do_DELETE(self):
+        if self._delay():
+            return
+        self._send(204)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def api_stand_in(posts, latency=0.0, failure_rate=0.0):
+    """
+    Run a local stand-in for the upstream ``/Api/V1/`` REST API serving
+    ``posts``, answering after ``latency`` seconds and with a 503 for a
+    ``failure_rate`` share of requests; yields the server, whose
+    ``base_url``, ``calls`` and ``failures`` tell how it was used
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _APIHandler)
+    server.daemon_threads = True
+    server.posts = posts
+    server.by_slug = {post['slug']: post for post in posts}
+    server.collection = json.dumps(posts).encode()
+    server.etag = f'"{hashlib.sha256(server.collection).hexdigest()[:16]}"'
+    server.latency = latency
+    server.failure_rate = failure_rate
+    server.lock = threading.Lock()
+    server.calls = 0
+    server.failures = 0
+    server.next_id = max((post['id'] for post in posts), default=0)
+    server.base_url = f'http://127.0.0.1:{server.server_address[1]}/Api/V1'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
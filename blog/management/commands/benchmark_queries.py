@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from blog.management.benchmark import seed_posts, temporary_database, time_call
+from blog.models import create_blog
+
+
+def _queries(rows):
+    slug = f'benchmark-post-{rows // 2}'
+    return {
+        'detail by slug': create_blog.objects.filter(slug=slug),
+        'category page': create_blog.objects.filter(Category='news').order_by('-date')[:6],
+        'recent posts': create_blog.objects.order_by('-date')[:5],
+        'home page': create_blog.objects.all().order_by('-date')[:6],
+    }
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway database with posts and report query plans and timings '
+            'for the create_blog access paths, with and without indexes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000,
+                            help='Number of posts to seed (default: 100000)')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Runs per query; the median is reported (default: 5)')
+
+    def run(self, sql, params, indexed):
+        if not indexed:
+            # SQLite lets us ignore every index on the table for this query
+            sql = sql.replace('FROM "blog_create_blog"', 'FROM "blog_create_blog" NOT INDEXED')
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = '; '.join(str(row[-1]) for row in cursor.fetchall())
+
+            def execute():
+                cursor.execute(sql, params)
+                cursor.fetchall()
+
+            return plan, time_call(execute, self.repeat)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        self.repeat = options['repeat']
+        sqlite = connection.vendor == 'sqlite'
+        if not sqlite:
+            self.stdout.write(self.style.WARNING(
+                'Unindexed timings use SQLite NOT INDEXED and are skipped on this backend.'))
+
+        with temporary_database():
+            self.stdout.write(f'Seeding {rows} posts...')
+            seed_posts(rows)
+
+            for name, queryset in _queries(rows).items():
+                sql, params = queryset.query.sql_with_params()
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                variants = [('before', False), ('after', True)] if sqlite else [('after', True)]
+                for label, indexed in variants:
+                    plan, ms = self.run(sql, params, indexed)
+                    self.stdout.write(f'  {label:6} {ms:9.3f} ms  {plan}')
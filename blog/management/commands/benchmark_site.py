@@ -0,0 +1,366 @@
+import json
+import logging
+import os
+import platform
+import re
+import tempfile
+import threading
+import time
+import uuid
+from io import BytesIO
+
+import django
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+
+from blog import fts, mirror
+from blog.api_client import reset_client
+from blog.async_api import reset_async_client
+from blog.images import build_variants
+from blog.management.benchmark import api_stand_in, peak_rss_kb, percentile, seed_posts, temporary_database
+from blog.models import BlogStats, create_blog
+
+SAMPLE_IMAGE = 'blog/images/benchmark.jpg'
+
+SERVER_TIMING_RE = re.compile(r'(\w+);dur=([\d.]+)(?:;desc="(\d+) )?')
+
+# Compared against a baseline: higher is worse for all but throughput
+REGRESSION_CHECKS = (
+    ('errors', 'higher'),
+    ('p95_ms', 'higher'),
+    ('p99_ms', 'higher'),
+    ('throughput_rps', 'lower'),
+    ('queries_mean', 'higher'),
+)
+
+
+def _routes(slugs, categories):
+    """
+    ``{name: request(i) -> (method, path, options)}`` for every benchmarked route.
+
+    Left out: the admin, blog_delete and the edit/contact form posts, which
+    change or send data a run can't sensibly repeat.
+    """
+    def pick(items, i):
+        return items[i % len(items)]
+
+    def create(i):
+        body = {
+            'title': f'Benchmark create {i}',
+            'slug': f'benchmark-create-{uuid.uuid4().hex[:12]}',
+            'Author_name': 'Benchmark',
+            'content': 'Created by benchmark_site',
+            'Category': pick(categories, i),
+        }
+        return 'post', '/blog/api/create/', {'data': json.dumps(body), 'content_type': 'application/json'}
+
+    return {
+        'home': lambda i: ('get', '/', {}),
+        'about': lambda i: ('get', '/about/', {}),
+        'categories': lambda i: ('get', '/categories/', {}),
+        'contact': lambda i: ('get', '/contact/', {}),
+        'blog_list': lambda i: ('get', f'/blog/?page={i % 5 + 1}', {}),
+        'blog_detail': lambda i: ('get', f'/blog/detail/{pick(slugs, i)}/', {}),
+        'blog_edit': lambda i: ('get', f'/blog/edit/{pick(slugs, i)}/', {}),
+        'blog_search': lambda i: ('get', f'/blog/search/?q=word{i % 97}', {}),
+        'blog_category': lambda i: ('get', f'/blog/category/{pick(categories, i)}/', {}),
+        'recent_blogs': lambda i: ('get', '/blog/recent/', {}),
+        'blog_stats': lambda i: ('get', '/blog/stats/', {}),
+        'api_blog_list': lambda i: ('get', f'/blog/api-blogs/?page={i % 3 + 1}', {}),
+        'api_integration': lambda i: ('get', '/blog/api/integration/', {}),
+        'api_create_blog': create,
+        'sync_blogs_to_api': lambda i: ('post', '/blog/sync-to-api/', {}),
+        'metrics': lambda i: ('get', '/metrics/', {}),
+        'media': lambda i: ('get', f'/media/{SAMPLE_IMAGE}', {}),
+    }
+
+
+def _server_timing(header):
+    """
+    ``{name: (ms, count)}`` from a Server-Timing header set by blog.instrumentation
+    """
+    timings = {}
+    for name, duration, count in SERVER_TIMING_RE.findall(header or ''):
+        timings[name] = (float(duration), int(count) if count else None)
+    return timings
+
+
+def _run_route(request_for, clients, total):
+    """
+    Send ``total`` requests from ``clients`` concurrent clients; returns the per-request samples
+    """
+    samples = []
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def worker():
+        client = Client(raise_request_exception=False)
+        try:
+            while True:
+                with lock:
+                    i = next(counter, None)
+                if i is None:
+                    return
+                method, path, options = request_for(i)
+                started = time.perf_counter()
+                try:
+                    response = getattr(client, method)(path, **options)
+                    if getattr(response, 'streaming', False):
+                        b''.join(response.streaming_content)
+                    status = response.status_code
+                    timing = _server_timing(response.get('Server-Timing'))
+                    cache_hit = response.get('X-Page-Cache') == 'HIT'
+                except Exception:
+                    status, timing, cache_hit = None, {}, False
+                elapsed = time.perf_counter() - started
+                with lock:
+                    samples.append((elapsed, status, timing, cache_hit))
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def _summary(samples, wall):
+    latencies = [elapsed * 1000 for elapsed, _, _, _ in samples]
+    queries = [timing['db'][1] for _, _, timing, _ in samples if 'db' in timing]
+    upstream = [timing['upstream'][1] for _, _, timing, _ in samples if 'upstream' in timing]
+    statuses = {}
+    for _, status, _, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    errors = sum(1 for _, status, _, _ in samples if status is None or status >= 500)
+
+    def mean(values):
+        return round(sum(values) / len(values), 2) if values else None
+
+    def ms(value):
+        return round(value, 2) if value is not None else None
+
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'statuses': statuses,
+        'throughput_rps': round(len(samples) / wall, 1) if wall else None,
+        'mean_ms': mean(latencies),
+        'p50_ms': ms(percentile(latencies, 0.50)),
+        'p95_ms': ms(percentile(latencies, 0.95)),
+        'p99_ms': ms(percentile(latencies, 0.99)),
+        'max_ms': ms(max(latencies, default=None)),
+        'queries_mean': mean(queries),
+        'queries_max': max(queries, default=None),
+        'db_ms_mean': mean([timing['db'][0] for _, _, timing, _ in samples if 'db' in timing]),
+        'upstream_calls_mean': mean(upstream),
+        'template_ms_mean': mean([timing['tpl'][0] for _, _, timing, _ in samples if 'tpl' in timing]),
+        'page_cache_hit_ratio': round(sum(1 for sample in samples if sample[3]) / len(samples), 3) if samples else None,
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+def _regressions(baseline, report, threshold):
+    """
+    Human-readable lines for every metric worse than ``baseline`` by more than ``threshold`` percent
+    """
+    found = []
+    for name, current in report['routes'].items():
+        before = baseline.get('routes', {}).get(name)
+        if not before:
+            continue
+        for metric, worse in REGRESSION_CHECKS:
+            old, new = before.get(metric), current.get(metric)
+            if old is None or new is None:
+                continue
+            if metric == 'errors':
+                # A failing route is usually faster: any new error is a regression
+                regressed = new > old
+            elif metric == 'queries_mean':
+                # Query counts are exact: any extra query is a regression
+                regressed = new > old + 0.5
+            elif worse == 'higher':
+                regressed = new > old * (1 + threshold / 100)
+            else:
+                regressed = new < old * (1 - threshold / 100)
+            if regressed:
+                found.append(f'{name}: {metric} {old} -> {new}')
+    old_rss, new_rss = baseline.get('peak_rss_kb'), report.get('peak_rss_kb')
+    if old_rss and new_rss and new_rss > old_rss * (1 + threshold / 100):
+        found.append(f'peak_rss_kb {old_rss} -> {new_rss}')
+    return found
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway database, start a stand-in for the REST API and drive every site route '
+            'with concurrent clients; reports throughput, latency percentiles, query counts and '
+            'peak RSS as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000,
+                            help='Local posts to seed, also served by the stand-in API (default: 1000)')
+        parser.add_argument('--clients', type=int, default=8,
+                            help='Concurrent clients (default: 8)')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per route (default: 200)')
+        parser.add_argument('--latency', type=float, default=20,
+                            help='Stand-in API latency in ms (default: 20)')
+        parser.add_argument('--failure-rate', type=float, default=0.0,
+                            help='Share of stand-in API requests answered with 503, 0-1 (default: 0)')
+        parser.add_argument('--routes', nargs='+', default=None,
+                            help='Only run these routes (default: all)')
+        parser.add_argument('--mirror', action='store_true',
+                            help='Fill the local mirror first, so API-backed views read from it')
+        parser.add_argument('--output', default=None,
+                            help='Write the JSON report to this file instead of stdout')
+        parser.add_argument('--baseline', default=None,
+                            help='JSON report of an earlier run to compare against')
+        parser.add_argument('--threshold', type=float, default=10.0,
+                            help='With --baseline, fail when a metric is this many percent worse (default: 10)')
+
+    def progress(self, message):
+        self.stderr.write(message)
+
+    def seed(self, rows):
+        from PIL import Image
+
+        buffer = BytesIO()
+        Image.new('RGB', (1600, 1067), (90, 120, 160)).save(buffer, 'JPEG', quality=85)
+        default_storage.save(SAMPLE_IMAGE, ContentFile(buffer.getvalue()))
+        seed_posts(rows, content_words=200, image=SAMPLE_IMAGE)
+        variants = build_variants(create_blog.objects.first().image)
+        create_blog.objects.update(image_variants=variants)
+        BlogStats.recompute()
+        if fts.available():
+            fts.rebuild()
+
+    def upstream_posts(self):
+        # The stand-in serves the seeded posts, so slugs resolve on both sides
+        return [
+            {
+                'id': post['id'],
+                'title': post['title'],
+                'slug': post['slug'],
+                'Author_name': post['Author_name'],
+                'content': post['content'],
+                'Category': post['Category'],
+                'date': post['date'].isoformat(),
+                'updated_at': post['date'].isoformat(),
+                'image_url': None,
+            }
+            for post in create_blog.objects.order_by('-date').values(
+                'id', 'title', 'slug', 'Author_name', 'content', 'Category', 'date',
+            )
+        ]
+
+    def handle(self, *args, **options):
+        if options['clients'] < 1 or options['requests'] < 1 or options['rows'] < 1:
+            raise CommandError('--rows, --clients and --requests must be at least 1.')
+        if not 0 <= options['failure_rate'] <= 1:
+            raise CommandError('--failure-rate must be between 0 and 1.')
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        report = {
+            'config': {
+                'rows': options['rows'],
+                'clients': options['clients'],
+                'requests': options['requests'],
+                'latency_ms': options['latency'],
+                'failure_rate': options['failure_rate'],
+                'mirror': options['mirror'],
+            },
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'debug': settings.DEBUG,
+            },
+            'routes': {},
+        }
+
+        with tempfile.TemporaryDirectory() as workdir, override_settings(MEDIA_ROOT=workdir):
+            # A file, not SQLite's shared in-memory database, so clients can write concurrently
+            test_name = os.path.join(workdir, 'benchmark.sqlite3') if connection.vendor == 'sqlite' else None
+            with temporary_database(test_name=test_name):
+                self.progress(f"Seeding {options['rows']} posts...")
+                self.seed(options['rows'])
+                posts = self.upstream_posts()
+                slugs = [post['slug'] for post in posts]
+                categories = [key for key, _ in create_blog.typeofblog]
+                routes = _routes(slugs, categories)
+                names = options['routes'] or list(routes)
+                unknown = sorted(set(names) - set(routes))
+                if unknown:
+                    raise CommandError(f"Unknown routes: {', '.join(unknown)}. Choose from: {', '.join(routes)}")
+
+                with api_stand_in(posts, options['latency'] / 1000, options['failure_rate']) as api, \
+                        override_settings(
+                            REST_API_BASE_URL=api.base_url,
+                            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                            BLOG_INSTRUMENTATION={'SERVER_TIMING': True, 'SLOW_REQUEST_MS': None},
+                        ):
+                    reset_client()
+                    reset_async_client()
+                    # One line per upstream call would drown the progress output
+                    api_logger = logging.getLogger('blog.api')
+                    api_log_level = api_logger.level
+                    api_logger.setLevel(logging.WARNING)
+                    try:
+                        if options['mirror']:
+                            for alias in settings.CACHES:
+                                caches[alias].clear()
+                            mirror.sync(full=True)
+                        for name in names:
+                            # Every route starts from cold caches (the mirror lives in the database)
+                            for alias in settings.CACHES:
+                                caches[alias].clear()
+                            calls_before = api.calls
+                            samples, wall = _run_route(routes[name], options['clients'], options['requests'])
+                            summary = _summary(samples, wall)
+                            summary['upstream_requests'] = api.calls - calls_before
+                            report['routes'][name] = summary
+                            self.progress(
+                                f"{name:>18}: {summary['throughput_rps']:>8} req/s  "
+                                f"p50 {summary['p50_ms']:>8} ms  p95 {summary['p95_ms']:>8} ms  "
+                                f"p99 {summary['p99_ms']:>8} ms  queries {summary['queries_mean']}  "
+                                f"errors {summary['errors']}"
+                            )
+                    finally:
+                        api_logger.setLevel(api_log_level)
+                        reset_client()
+                        reset_async_client()
+                    report['upstream'] = {'requests': api.calls, 'injected_failures': api.failures}
+        report['peak_rss_kb'] = peak_rss_kb()
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+        failures = []
+        if baseline is not None:
+            regressions = _regressions(baseline, report, options['threshold'])
+            if regressions:
+                failures.append(f'{len(regressions)} regressions beyond {options["threshold"]}%')
+            for line in regressions:
+                self.stderr.write(self.style.ERROR(line))
+            if not regressions:
+                self.progress(self.style.SUCCESS(f'No regressions beyond {options["threshold"]}% of the baseline'))
+        failing = {name: summary['errors'] for name, summary in report['routes'].items() if summary['errors']}
+        if failing:
+            # Timings of a route that answers 5xx mean nothing
+            failures.append('routes with errors: ' + ', '.join(f'{name} ({count})' for name, count in failing.items()))
+        if failures:
+            raise CommandError('; '.join(failures))
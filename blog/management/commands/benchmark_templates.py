@@ -0,0 +1,65 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.urls import resolve
+
+from blog.management.benchmark import seed_posts, temporary_database, time_call
+from blog.models import create_blog
+
+# What blog.images records for a post with derivatives; the tag only
+# builds URLs from it, so the files don't have to exist
+SAMPLE_VARIANTS = {
+    'source': 'blog/images/sample.jpg',
+    'hash': '0123456789abcdef',
+    'width': 1600,
+    'height': 1067,
+    'variants': {
+        size: {
+            'width': width,
+            'height': round(width * 2 / 3),
+            'jpeg': f'blog/derived/0123456789abcdef/{size}.jpg',
+            'webp': f'blog/derived/0123456789abcdef/{size}.webp',
+        }
+        for size, width in (('card', 480), ('detail', 960), ('hero', 1600))
+    },
+}
+
+
+class Command(BaseCommand):
+    help = ('Render the home page template with N post cards and report the median render time '
+            'with cold and warm fragment caches')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, nargs='+', default=[6, 60],
+                            help='Card counts to render (default: 6 60)')
+        parser.add_argument('--repeat', type=int, default=50,
+                            help='Renders per measurement; the median is reported (default: 50)')
+
+    def handle(self, *args, **options):
+        fragments = caches['template_fragments']
+        request = RequestFactory().get('/')
+        request.resolver_match = resolve('/')
+
+        with temporary_database():
+            seed_posts(max(options['cards']), content_words=200, image='blog/images/sample.jpg')
+            create_blog.objects.update(image_variants=SAMPLE_VARIANTS)
+
+            self.stdout.write(f"{'cards':>6} {'cold ms':>10} {'warm ms':>10} {'speedup':>8}")
+            for count in options['cards']:
+                posts = list(create_blog.objects.cards().order_by('-date')[:count])
+                context = {'latest_blogs': posts, 'featured_post': posts[0], 'api_mode': False}
+
+                def render():
+                    return render_to_string('home.html', context, request=request)
+
+                def cold():
+                    # Every fragment rendered from scratch, as before caching
+                    fragments.clear()
+                    render()
+
+                render()  # compile and load the templates first
+                cold_ms = time_call(cold, options['repeat'])
+                render()
+                warm_ms = time_call(render, options['repeat'])
+                self.stdout.write(f'{count:>6} {cold_ms:>10.3f} {warm_ms:>10.3f} {cold_ms / warm_ms:>7.1f}x')
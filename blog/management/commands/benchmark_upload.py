@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from blog.api_client import BlogAPIClient
+from blog.management.benchmark import peak_rss_kb, sink_server
+
+MODES = ('streaming', 'buffered')
+
+
+def _upload(mode, base_url, path, results):
+    client = BlogAPIClient(BASE_URL=base_url)
+    data = {'title': 'Upload benchmark', 'slug': 'upload-benchmark', 'Category': 'news'}
+    rss_before = peak_rss_kb()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(path, 'rb') as image:
+        if mode == 'buffered':
+            # How uploads used to be forwarded
+            files = {'image': ('photo.jpg', image.read(), 'image/jpeg')}
+            response = client.post('blogs/', data=data, files=files)
+        else:
+            files = {'image': ('photo.jpg', image, 'image/jpeg')}
+            response = client.upload('POST', 'blogs/', data=data, files=files)
+    elapsed = time.perf_counter() - start
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    client.close()
+    results.put((mode, response.status_code, elapsed, traced_peak, peak_rss_kb() - rss_before))
+
+
+class Command(BaseCommand):
+    help = ('Forward a large image to a local stand-in for the REST API, buffered and streamed, '
+            'and report peak memory for each')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=50,
+                            help='Image size in MB (default: 50)')
+
+    def handle(self, *args, **options):
+        size = options['size'] * 1024 * 1024
+        with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as image:
+            block = os.urandom(1024 * 1024)
+            for _ in range(options['size']):
+                image.write(block)
+        try:
+            with sink_server() as base_url:
+                results = multiprocessing.Queue()
+                for mode in MODES:
+                    # Each mode runs in its own process so peak RSS isn't shared
+                    process = multiprocessing.Process(target=_upload, args=(mode, base_url, image.name, results))
+                    process.start()
+                    process.join()
+                    if process.exitcode:
+                        self.stderr.write(self.style.ERROR(f'{mode} upload failed'))
+                        continue
+                    mode, status, elapsed, traced_peak, rss_growth = results.get()
+                    self.stdout.write(
+                        f'{mode:>10}: HTTP {status}, {elapsed * 1000:.0f} ms, '
+                        f'peak Python allocations {traced_peak / 1024 / 1024:.1f} MB, '
+                        f'peak RSS growth {rss_growth / 1024:.1f} MB '
+                        f'(image {size / 1024 / 1024:.0f} MB)'
+                    )
+        finally:
+            os.unlink(image.name)
@@ -0,0 +1,137 @@
+import gzip
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import tempfile
+import time
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+FONTS_CSS_URL = 'https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700;800&display=swap'
+FONT_SUBSETS = ('latin', 'latin-ext')
+CDN_URL = 'https://cdn.tailwindcss.com'
+
+# Google Fonts only serves woff2 to browsers it knows support it
+BROWSER_USER_AGENT = ('Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 '
+                      '(KHTML, like Gecko) Chrome/124.0 Safari/537.36')
+
+FONT_FACE_RE = re.compile(r'/\*\s*(?P<subset>[\w-]+)\s*\*/\s*@font-face\s*\{(?P<body>[^}]*)\}')
+FONT_URL_RE = re.compile(r'url\((?P<url>[^)]+)\)')
+FONT_WEIGHT_RE = re.compile(r'font-weight:\s*(?P<weight>[\d ]+);')
+
+
+def _fetch(url):
+    request = urllib.request.Request(url, headers={'User-Agent': BROWSER_USER_AGENT})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+def _gzip_size(data):
+    return len(gzip.compress(data, compresslevel=9))
+
+
+class Command(BaseCommand):
+    help = ('Build static/css/site.css: a minified Tailwind CSS build of the classes the templates '
+            'actually use, plus self-hosted @font-face rules for Inter')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cli', default=None,
+                            help='Tailwind v3 CLI command (default: settings.TAILWIND_CLI, '
+                                 '"tailwindcss" on PATH, or "npx --yes tailwindcss@3")')
+        parser.add_argument('--fonts', action='store_true',
+                            help='Download Inter into static/fonts/ (needed once)')
+        parser.add_argument('--compare-cdn', action='store_true',
+                            help='Also download the Play CDN script and Google Fonts CSS to compare sizes')
+
+    def cli(self, option):
+        command = option or getattr(settings, 'TAILWIND_CLI', None)
+        if command:
+            return shlex.split(command) if isinstance(command, str) else list(command)
+        if shutil.which('tailwindcss'):
+            return ['tailwindcss']
+        return ['npx', '--yes', 'tailwindcss@3']
+
+    def download_fonts(self, fonts_dir):
+        """
+        Save Inter's woff2 files and write fonts/inter.css pointing at them
+        """
+        os.makedirs(fonts_dir, exist_ok=True)
+        google_css = _fetch(FONTS_CSS_URL).decode('utf-8')
+        faces = [match for match in FONT_FACE_RE.finditer(google_css) if match['subset'] in FONT_SUBSETS]
+        if not faces:
+            raise CommandError('No @font-face rules found in the Google Fonts response')
+        urls = {}
+        rules = []
+        for face in faces:
+            body = face['body']
+            remote = FONT_URL_RE.search(body)['url'].strip('\'"')
+            if remote not in urls:
+                # Inter is a variable font, so one file per subset usually
+                # serves every weight; otherwise name the files by weight
+                name = f"inter-{face['subset']}.woff2"
+                if name in urls.values():
+                    weight = FONT_WEIGHT_RE.search(body)['weight'].strip().replace(' ', '-')
+                    name = f"inter-{face['subset']}-{weight}.woff2"
+                with open(os.path.join(fonts_dir, name), 'wb') as f:
+                    f.write(_fetch(remote))
+                urls[remote] = name
+                self.stdout.write(f'Downloaded fonts/{name}')
+            # site.css lives in static/css/, next to static/fonts/
+            local_body = FONT_URL_RE.sub(f'url(../fonts/{urls[remote]})', body, count=1)
+            rules.append(f"@font-face{{{' '.join(local_body.split())}}}")
+        with open(os.path.join(fonts_dir, 'inter.css'), 'w') as f:
+            f.write('\n'.join(rules) + '\n')
+
+    def handle(self, *args, **options):
+        base_dir = str(settings.BASE_DIR)
+        static_dir = os.path.join(base_dir, 'static')
+        fonts_dir = os.path.join(static_dir, 'fonts')
+        output = os.path.join(static_dir, 'css', 'site.css')
+
+        if options['fonts']:
+            self.download_fonts(fonts_dir)
+
+        command = self.cli(options['cli'])
+        with tempfile.TemporaryDirectory() as tmp:
+            built = os.path.join(tmp, 'tailwind.css')
+            start = time.perf_counter()
+            try:
+                subprocess.run(
+                    [*command, '-c', 'tailwind.config.js', '-i', os.path.join('assets', 'tailwind.css'),
+                     '-o', built, '--minify'],
+                    cwd=base_dir, check=True,
+                )
+            except (OSError, subprocess.CalledProcessError) as e:
+                raise CommandError(f'Tailwind build failed ({" ".join(command)}): {e}')
+            elapsed = time.perf_counter() - start
+            with open(built, 'rb') as f:
+                css = f.read()
+
+        fonts_css = os.path.join(fonts_dir, 'inter.css')
+        if os.path.exists(fonts_css):
+            with open(fonts_css, 'rb') as f:
+                css = f.read() + css
+        else:
+            self.stderr.write(self.style.WARNING(
+                'static/fonts/inter.css is missing; run with --fonts once to self-host Inter.'))
+
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, 'wb') as f:
+            f.write(css)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote static/css/site.css in {elapsed:.1f}s: {len(css) / 1024:.1f} KB, '
+            f'{_gzip_size(css) / 1024:.1f} KB gzipped. collectstatic gives it a hashed name.'
+        ))
+
+        if options['compare_cdn']:
+            cdn = _fetch(CDN_URL)
+            fonts = _fetch(FONTS_CSS_URL)
+            self.stdout.write(
+                f'Before: Play CDN script {len(cdn) / 1024:.1f} KB ({_gzip_size(cdn) / 1024:.1f} KB gzipped), '
+                f'render-blocking and compiled in the browser, plus {len(fonts) / 1024:.1f} KB of '
+                f'Google Fonts CSS from a second origin'
+            )
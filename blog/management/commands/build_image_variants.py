@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from blog.images import needs_variants, update_variants
+from blog.models import create_blog
+
+
+class Command(BaseCommand):
+    help = 'Generate resized and WebP copies of post images that are missing them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Rebuild derivatives for every post with an image')
+
+    def handle(self, *args, **options):
+        posts = create_blog.objects.exclude(image='').only('id', 'image', 'image_variants')
+        built = failed = 0
+        for blog in posts.iterator(chunk_size=200):
+            if not (options['force'] or needs_variants(blog)):
+                continue
+            try:
+                update_variants(blog)
+            except (OSError, ValueError) as e:
+                failed += 1
+                self.stderr.write(f'Post {blog.pk}: {e}')
+                continue
+            built += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Built derivatives for post {blog.pk}')
+        self.stdout.write(self.style.SUCCESS(f'Built derivatives for {built} posts ({failed} failed)'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import fts
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the SQLite FTS5 search table for blog posts in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of posts indexed per transaction (default: 1000)')
+
+    def handle(self, *args, **options):
+        if not fts.supported():
+            raise CommandError('Full-text search requires the sqlite3 database backend.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        stdout = self.stdout if options['verbosity'] > 1 else None
+        total = fts.rebuild(batch_size=options['batch_size'], stdout=stdout)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search index for {total} posts'))
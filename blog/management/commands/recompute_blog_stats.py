@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import BlogStats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-category post counts stored in BlogStats'
+
+    def handle(self, *args, **options):
+        counts = BlogStats.recompute()
+        for category, count in sorted(counts.items()):
+            self.stdout.write(f'{category}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'Recomputed stats for {sum(counts.values())} posts'))
@@ -0,0 +1,71 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog.jobs import run_worker
+
+
+def _worker_process(index, burst, poll_interval):
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        # Spawned (not forked) children start without Django set up
+        django.setup()
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+    try:
+        run_worker(index, burst=burst, poll_interval=poll_interval, stop=lambda: bool(stopping))
+    except KeyboardInterrupt:
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Run background job workers (see blog/jobs.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Number of worker processes (default: 1, in this process)')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once no job is due instead of polling forever')
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help='Seconds to sleep when the queue is empty (default: BLOG_JOBS["POLL_INTERVAL"])')
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        burst = options['burst']
+        poll_interval = options['poll_interval']
+
+        if workers == 1:
+            self.stdout.write('Starting 1 worker')
+            try:
+                processed = run_worker(0, burst=burst, poll_interval=poll_interval)
+            except KeyboardInterrupt:
+                return
+            self.stdout.write(self.style.SUCCESS(f'Ran {processed} jobs'))
+            return
+
+        # Children must not share this process's database connections
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(
+                target=_worker_process,
+                args=(index, burst, poll_interval),
+                name=f'blog-worker-{index}',
+            )
+            for index in range(workers)
+        ]
+        self.stdout.write(f'Starting {workers} workers')
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
+        self.stdout.write(self.style.SUCCESS('Workers stopped'))
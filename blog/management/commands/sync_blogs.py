@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from blog.api_client import api_settings
+from blog.sync import sync_blogs
+
+
+class Command(BaseCommand):
+    help = 'Push new and changed local blog posts to the REST API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Concurrent uploads (default: BLOG_API["SYNC_WORKERS"])')
+        parser.add_argument('--force', action='store_true',
+                            help='Send every post, even ones already synced')
+        parser.add_argument('--bulk', action='store_true',
+                            help='Send batches to BLOG_API["BULK_ENDPOINT"] (without images)')
+
+    def handle(self, *args, **options):
+        if options['bulk'] and not api_settings().get('BULK_ENDPOINT'):
+            self.stderr.write(self.style.WARNING('BULK_ENDPOINT is not configured; posting one by one.'))
+
+        def progress(run):
+            self.stdout.write(f'{run.processed}/{run.total} processed '
+                              f'({run.succeeded} sent, {run.skipped} unchanged, {run.failed} failed)')
+
+        run = sync_blogs(
+            workers=options['workers'],
+            force=options['force'],
+            bulk=options['bulk'],
+            progress=progress if options['verbosity'] > 1 else None,
+        )
+        style = self.style.SUCCESS if not run.failed else self.style.WARNING
+        self.stdout.write(style(
+            f'Sync run {run.pk} finished: {run.succeeded} sent, '
+            f'{run.skipped} unchanged, {run.failed} failed'
+        ))
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.mirror import MirrorError, sync
+
+
+class Command(BaseCommand):
+    help = 'Pull upstream blog changes into the local mirror (see blog/mirror.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Revalidate the whole collection and drop posts deleted upstream')
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Keep syncing every N seconds instead of exiting')
+        parser.add_argument('--full-every', type=int, default=0,
+                            help='With --interval, make every Nth sync a full one (default: never)')
+
+    def _sync(self, full):
+        try:
+            result = sync(full=full)
+        except MirrorError as e:
+            return str(e)
+        if result['fetched'] is None:
+            self.stdout.write(f"{result['mode'].capitalize()} sync: upstream unchanged")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"{result['mode'].capitalize()} sync: {result['fetched']} fetched, "
+                f"{result['changed']} changed, {result['deleted']} deleted"
+            ))
+        return None
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        if interval is None:
+            error = self._sync(options['full'])
+            if error:
+                raise CommandError(f'Mirror sync failed: {error}')
+            return
+
+        runs = 0
+        try:
+            while True:
+                full_every = options['full_every']
+                full = (options['full'] and runs == 0) or (full_every > 0 and runs % full_every == 0)
+                error = self._sync(full)
+                if error:
+                    # Keep the last good copy and try again next time
+                    self.stderr.write(self.style.WARNING(f'Mirror sync failed: {error}'))
+                runs += 1
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,183 @@
+"""
+In-process metrics, exposed in the Prometheus text format at ``/metrics/``.
+
+Metrics are kept per worker process; Prometheus scrapes each worker (or
+sums them) as usual. Each metric is created once at import time::
+
+    hits = counter('blog_page_cache_requests_total', 'Page cache lookups', ['view', 'result'])
+    hits.inc(view='home', result='hit')
+
+Values that are cheaper to read than to track (e.g. state kept in the
+cache) can be refreshed just before each scrape with ``on_collect(func)``.
+
+Histograms count observations into cumulative ``le`` buckets::
+
+    latency = histogram('blog_request_duration_seconds', 'Request latency', ['view'])
+    latency.observe(0.042, view='home')
+"""
+import threading
+
+_registry = {}
+_collectors = []
+_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return f'{{{pairs}}}'
+
+
+def _format_value(value):
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """
+        ``[(suffix, label names, label values, value), ...]`` for the exposition
+        """
+        with self._lock:
+            return [('', self.labelnames, key, value) for key, value in sorted(self._values.items())]
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, amount, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if amount <= bound:
+                    state['buckets'][index] += 1
+            state['sum'] += amount
+            state['count'] += 1
+
+    def samples(self):
+        names = self.labelnames + ('le',)
+        with self._lock:
+            values = sorted((key, dict(state, buckets=list(state['buckets']))) for key, state in self._values.items())
+        samples = []
+        for key, state in values:
+            for bound, count in zip(self.buckets, state['buckets']):
+                samples.append(('_bucket', names, key + (_format_value(bound),), count))
+            samples.append(('_bucket', names, key + ('+Inf',), state['count']))
+            samples.append(('_sum', self.labelnames, key, state['sum']))
+            samples.append(('_count', self.labelnames, key, state['count']))
+        return samples
+
+    def value(self, **labels):
+        """
+        The number of observations
+        """
+        with self._lock:
+            state = self._values.get(self._key(labels))
+        return state['count'] if state else 0
+
+
+def _register(cls, name, documentation, labelnames, **options):
+    with _lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, documentation, labelnames, **options)
+        elif not isinstance(metric, cls):
+            raise ValueError(f'{name} is already registered as a {metric.kind}')
+        return metric
+
+
+def counter(name, documentation, labelnames=()):
+    return _register(Counter, name, documentation, labelnames)
+
+
+def gauge(name, documentation, labelnames=()):
+    return _register(Gauge, name, documentation, labelnames)
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return _register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+
+def on_collect(func):
+    """
+    Call ``func()`` before every scrape, e.g. to set a gauge
+    """
+    with _lock:
+        if func not in _collectors:
+            _collectors.append(func)
+    return func
+
+
+def render_prometheus():
+    """
+    All registered metrics in the Prometheus text exposition format
+    """
+    with _lock:
+        collectors = list(_collectors)
+    for func in collectors:
+        func()
+    lines = []
+    with _lock:
+        metrics = sorted(_registry.values(), key=lambda metric: metric.name)
+    for metric in metrics:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for suffix, names, values, value in metric.samples():
+            lines.append(f'{metric.name}{suffix}{_format_labels(names, values)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,61 @@
+from django.db import migrations
+
+# A frozen copy of blog.fts as of this migration, so later changes to that
+# module can't change what this migration does
+
+FTS_TABLE = 'blog_create_blog_fts'
+
+INSTALL_SQL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS blog_create_blog_fts USING fts5(
+        title, content, Author_name, content='blog_create_blog', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS blog_create_blog_fts_ai AFTER INSERT ON blog_create_blog BEGIN
+        INSERT INTO blog_create_blog_fts(rowid, title, content, Author_name)
+        VALUES (new.id, new.title, new.content, new.Author_name);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blog_create_blog_fts_ad AFTER DELETE ON blog_create_blog BEGIN
+        INSERT INTO blog_create_blog_fts(blog_create_blog_fts, rowid, title, content, Author_name)
+        VALUES ('delete', old.id, old.title, old.content, old.Author_name);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blog_create_blog_fts_au AFTER UPDATE ON blog_create_blog BEGIN
+        INSERT INTO blog_create_blog_fts(blog_create_blog_fts, rowid, title, content, Author_name)
+        VALUES ('delete', old.id, old.title, old.content, old.Author_name);
+        INSERT INTO blog_create_blog_fts(rowid, title, content, Author_name)
+        VALUES (new.id, new.title, new.content, new.Author_name);
+    END""",
+]
+
+UNINSTALL_SQL = [
+    'DROP TRIGGER IF EXISTS blog_create_blog_fts_ai',
+    'DROP TRIGGER IF EXISTS blog_create_blog_fts_ad',
+    'DROP TRIGGER IF EXISTS blog_create_blog_fts_au',
+    'DROP TABLE IF EXISTS blog_create_blog_fts',
+]
+
+
+def install_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in INSTALL_SQL:
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in UNINSTALL_SQL:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_fts, uninstall_fts),
+    ]
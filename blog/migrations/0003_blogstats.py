@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:49
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_blog_stats(apps, schema_editor):
+    create_blog = apps.get_model('blog', 'create_blog')
+    BlogStats = apps.get_model('blog', 'BlogStats')
+    rows = create_blog.objects.values('Category').annotate(count=Count('id')).order_by()
+    BlogStats.objects.bulk_create(
+        BlogStats(category=row['Category'], count=row['count']) for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_create_blog_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlogStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=100, unique=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(fill_blog_stats, migrations.RunPython.noop),
+    ]
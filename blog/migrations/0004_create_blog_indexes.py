@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:50
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def normalize_posts(apps, schema_editor):
+    create_blog = apps.get_model('blog', 'create_blog')
+    BlogStats = apps.get_model('blog', 'BlogStats')
+
+    # Store categories lowercase so lookups no longer need iexact
+    create_blog.objects.exclude(Category=Lower('Category')).update(Category=Lower('Category'))
+    BlogStats.objects.all().delete()
+    rows = create_blog.objects.values('Category').annotate(count=Count('id')).order_by()
+    BlogStats.objects.bulk_create(
+        BlogStats(category=row['Category'], count=row['count']) for row in rows
+    )
+
+    # Make duplicate slugs unique before the unique index is added
+    duplicates = (
+        create_blog.objects.values('slug').annotate(n=Count('id')).filter(n__gt=1).values_list('slug', flat=True)
+    )
+    for slug in list(duplicates):
+        for post in create_blog.objects.filter(slug=slug).order_by('id')[1:]:
+            post.slug = f"{slug[:190]}-{post.id}"
+            post.save(update_fields=['slug'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_blogstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_posts, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='create_blog',
+            name='slug',
+            field=models.SlugField(max_length=200, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='create_blog',
+            index=models.Index(fields=['Category', '-date'], name='blog_category_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='create_blog',
+            index=models.Index(fields=['-date'], name='blog_date_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:51
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+
+def make_excerpt(content):
+    # Frozen copy of blog.models.make_excerpt as of this migration
+    text = ' '.join(strip_tags(content or '').split())
+    return Truncator(Truncator(text).words(40)).chars(300)
+
+
+def fill_excerpts(apps, schema_editor):
+    create_blog = apps.get_model('blog', 'create_blog')
+    batch = []
+    for post in create_blog.objects.only('id', 'content').iterator(chunk_size=1000):
+        post.excerpt = make_excerpt(post.content)
+        batch.append(post)
+        if len(batch) >= 1000:
+            create_blog.objects.bulk_update(batch, ['excerpt'])
+            batch = []
+    if batch:
+        create_blog.objects.bulk_update(batch, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_create_blog_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='create_blog',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
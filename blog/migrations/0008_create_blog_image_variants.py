@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='create_blog',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
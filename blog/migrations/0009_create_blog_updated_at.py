@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_create_blog_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='create_blog',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
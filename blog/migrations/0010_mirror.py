@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_create_blog_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MirrorState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('etag', models.CharField(blank=True, max_length=200)),
+                ('cursor', models.CharField(blank=True, max_length=64)),
+                ('synced_at', models.DateTimeField(blank=True, null=True)),
+                ('full_synced_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MirroredBlog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('upstream_id', models.IntegerField(unique=True)),
+                ('slug', models.SlugField(max_length=200, unique=True)),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('Category', models.CharField(blank=True, max_length=100)),
+                ('date', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(blank=True, null=True)),
+                ('data', models.JSONField(default=dict)),
+                ('mirrored_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['Category', '-date', '-upstream_id'], name='blog_mirror_category_date_idx'), models.Index(fields=['-date', '-upstream_id'], name='blog_mirror_date_idx')],
+            },
+        ),
+    ]
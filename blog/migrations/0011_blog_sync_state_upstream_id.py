@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_mirror'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogsyncstate',
+            name='upstream_id',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
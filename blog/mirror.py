@@ -0,0 +1,348 @@
+"""
+Local mirror of the upstream blog collection.
+
+``sync()`` (run periodically by ``manage.py sync_mirror``) copies upstream
+posts into ``MirroredBlog``:
+
+* incrementally, asking for ``blogs/?since=<newest updated_at seen>``;
+* in full with ``full=True``, or while upstream posts carry no
+  ``updated_at``: the whole collection is revalidated with
+  ``If-None-Match``, so an unchanged upstream costs a 304, and posts that
+  are gone upstream are dropped. ``since=`` can't report deletions, so a
+  full sync now and then is what reconciles them.
+
+Once a sync has completed the API-backed views (``blog_list``,
+``blog_detail``, ``home`` ...) read from the mirror with indexed queries
+instead of going over the network; searches go through the in-process
+inverted index ``blog.search.mirror_index``, which every write here
+keeps current. Writes still go upstream; the views
+and tasks that make them pass the result to ``record()`` / ``forget()``
+so the mirror shows them at once.
+"""
+import requests
+from django.core.cache import caches
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .api_client import api_settings, collection_result, get_client
+from .models import MirroredBlog, MirrorState
+from .page_cache import invalidate_pages
+from .search import mirror_index
+
+READY_KEY = 'blog:mirror:ready'
+
+# How long views trust what they learnt about the mirror being filled
+READY_TIMEOUT = 60
+
+# Posts per request when following upstream pagination
+PAGE_SIZE = 100
+
+# Rows per upsert / lookup query
+BATCH_SIZE = 500
+
+UPDATE_FIELDS = ['slug', 'title', 'Category', 'date', 'updated_at', 'data', 'mirrored_at']
+
+
+class MirrorError(Exception):
+    """
+    Raised when upstream can't be read during a sync
+    """
+
+
+def _cache():
+    return caches[api_settings()['CACHE_ALIAS']]
+
+
+def ready():
+    """
+    Whether a sync has completed, so reads can be served from the mirror
+    """
+    cache = _cache()
+    filled = cache.get(READY_KEY)
+    if filled is None:
+        filled = MirrorState.objects.filter(synced_at__isnull=False).exists()
+        cache.set(READY_KEY, filled, READY_TIMEOUT)
+    return filled
+
+
+def _datetime(value):
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(str(value))
+    except ValueError:
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _row(post, now):
+    if not isinstance(post, dict) or post.get('id') is None or not post.get('slug'):
+        return None
+    return MirroredBlog(
+        upstream_id=post['id'],
+        slug=post['slug'],
+        title=(post.get('title') or '')[:200],
+        Category=(post.get('Category') or '').lower(),
+        date=_datetime(post.get('date')),
+        updated_at=_datetime(post.get('updated_at')),
+        data=post,
+        mirrored_at=now,
+    )
+
+
+def _records(data):
+    if isinstance(data, dict):
+        return data.get('results') or []
+    if isinstance(data, list):
+        return data
+    return []
+
+
+def apply(posts):
+    """
+    Insert or update upstream posts in the mirror.
+
+    Returns ``(changed, slugs, categories)``: how many posts were new or
+    different, and the slugs and categories (old and new) they touch.
+    """
+    now = timezone.now()
+    rows = {}
+    for post in posts:
+        row = _row(post, now)
+        if row is not None:
+            rows[row.upstream_id] = row
+    rows = list(rows.values())
+
+    count, slugs, categories = 0, set(), set()
+    for start in range(0, len(rows), BATCH_SIZE):
+        batch = rows[start:start + BATCH_SIZE]
+        stored = {
+            upstream_id: (slug, category, data)
+            for upstream_id, slug, category, data in MirroredBlog.objects.filter(
+                upstream_id__in=[row.upstream_id for row in batch],
+            ).values_list('upstream_id', 'slug', 'Category', 'data')
+        }
+        changed = [
+            row for row in batch
+            if row.upstream_id not in stored or stored[row.upstream_id][2] != row.data
+        ]
+        if not changed:
+            continue
+        count += len(changed)
+        for row in changed:
+            slugs.add(row.slug)
+            categories.add(row.Category)
+            if row.upstream_id in stored:
+                slugs.add(stored[row.upstream_id][0])
+                categories.add(stored[row.upstream_id][1])
+        with transaction.atomic():
+            # A slug that moved to another post upstream
+            moved = MirroredBlog.objects.filter(slug__in=[row.slug for row in changed]).exclude(
+                upstream_id__in=[row.upstream_id for row in changed],
+            )
+            moved_ids = list(moved.values_list('upstream_id', flat=True))
+            moved.delete()
+            MirroredBlog.objects.bulk_create(
+                changed, update_conflicts=True, unique_fields=['upstream_id'], update_fields=UPDATE_FIELDS,
+            )
+        if moved_ids:
+            mirror_index.remove(moved_ids)
+        mirror_index.update([(row.upstream_id, row.Category, row.data) for row in changed])
+    return count, slugs, categories
+
+
+def record(post):
+    """
+    Reflect a post just created or updated upstream.
+
+    ``post`` is what was sent merged with what the API answered; it needs
+    at least the upstream ``id`` and ``slug``.
+    """
+    # Sort it where upstream will: a new post is the newest one
+    post = {'date': timezone.now().isoformat(), **post}
+    changed, slugs, categories = apply([post])
+    if changed:
+        invalidate_pages(slugs=slugs, categories=categories)
+
+
+def record_response(sent, response):
+    """
+    ``record()`` the post behind a successful create/update ``response``
+    """
+    try:
+        answer = response.json()
+    except ValueError:
+        return
+    if isinstance(answer, dict):
+        record({**sent, **answer})
+
+
+def forget(slug):
+    """
+    Drop a post just deleted upstream
+    """
+    rows = MirroredBlog.objects.filter(slug=slug)
+    upstream_ids = list(rows.values_list('upstream_id', flat=True))
+    if upstream_ids:
+        rows.delete()
+        mirror_index.remove(upstream_ids)
+
+
+def _get(params=None, etag=None):
+    headers = {'If-None-Match': etag} if etag else {}
+    return collection_result(get_client().get('blogs/', params=params, headers=headers))
+
+
+def _remaining_pages(data, params):
+    """
+    The posts on the pages after ``data``, when upstream paginated it
+    """
+    posts = []
+    number = 1
+    while isinstance(data, dict) and data.get('next') and _records(data):
+        number += 1
+        status, data, _, _ = _get({**params, 'page': number})
+        if status != 200:
+            raise MirrorError(f'Upstream answered {status} for page {number}')
+        posts += _records(data)
+    return posts
+
+
+def _fetch_since(cursor):
+    params = {'since': cursor, 'page_size': PAGE_SIZE}
+    status, data, _, _ = _get(params)
+    if status != 200:
+        raise MirrorError(f'Upstream answered {status}')
+    return _records(data) + _remaining_pages(data, params)
+
+
+def _fetch_all(etag):
+    """
+    ``(posts, etag)``; posts is None when the collection tagged ``etag`` is current
+    """
+    status, data, new_etag, _ = _get(etag=etag)
+    if status == 304:
+        return None, etag
+    if status != 200:
+        raise MirrorError(f'Upstream answered {status}')
+    if isinstance(data, dict) and data.get('next'):
+        # The tag only covers the first page: always fetch a paginated collection
+        return _records(data) + _remaining_pages(data, {}), ''
+    return _records(data), new_etag or ''
+
+
+def sync(full=False):
+    """
+    Pull upstream changes into the mirror.
+
+    Returns ``{'mode', 'fetched', 'changed', 'deleted'}``; raises
+    ``MirrorError`` when upstream can't be read.
+    """
+    state = MirrorState.load()
+    full = full or not state.cursor
+    deleted = []
+    try:
+        if full:
+            posts, state.etag = _fetch_all(state.etag)
+        else:
+            posts = _fetch_since(state.cursor)
+    except (requests.RequestException, ValueError) as e:
+        raise MirrorError(str(e)) from e
+
+    changed, slugs, categories = apply(posts or [])
+    if posts is not None and full:
+        seen = {post['id'] for post in posts if isinstance(post, dict) and post.get('id') is not None}
+        gone = MirroredBlog.objects.exclude(upstream_id__in=seen)
+        deleted = list(gone.values_list('upstream_id', 'slug', 'Category'))
+        if deleted:
+            gone.delete()
+            mirror_index.remove([upstream_id for upstream_id, _, _ in deleted])
+        slugs.update(slug for _, slug, _ in deleted)
+        categories.update(category for _, _, category in deleted)
+
+    cursors = [str(post['updated_at']) for post in posts or [] if isinstance(post, dict) and post.get('updated_at')]
+    if cursors:
+        state.cursor = max([state.cursor, *cursors])
+    now = timezone.now()
+    state.synced_at = now
+    if full:
+        state.full_synced_at = now
+    state.save()
+    _cache().set(READY_KEY, True, READY_TIMEOUT)
+
+    if slugs:
+        invalidate_pages(slugs=slugs, categories=categories)
+    return {
+        'mode': 'full' if full else 'incremental',
+        'fetched': len(posts) if posts is not None else None,
+        'changed': changed,
+        'deleted': len(deleted),
+    }
+
+
+# Reads
+
+def _ordered():
+    # Matches the (-date, -upstream_id) indexes
+    return MirroredBlog.objects.order_by('-date', '-upstream_id')
+
+
+def latest(limit):
+    """
+    The newest ``limit`` posts, as the API returns them
+    """
+    return list(_ordered().values_list('data', flat=True)[:limit])
+
+
+def get(slug):
+    """
+    The post with ``slug`` as the API returns it, or None
+    """
+    return MirroredBlog.objects.filter(slug=slug).values_list('data', flat=True).first()
+
+
+def related(post, limit=3):
+    """
+    Newest posts sharing ``post``'s category
+    """
+    return list(
+        _ordered().filter(Category=(post.get('Category') or '').lower())
+        .exclude(slug=post.get('slug'))
+        .values_list('data', flat=True)[:limit]
+    )
+
+
+def detail(slug, related_count=3):
+    """
+    ``(post, related posts)`` for a detail page, or None when ``slug`` isn't mirrored
+    """
+    post = get(slug)
+    if post is None:
+        return None
+    return post, related(post, related_count)
+
+
+def page(number, per_page, category=None, search=None):
+    """
+    A ``Page`` of mirrored posts, filtered like the upstream ``blogs/`` endpoint.
+
+    Search results are ranked by the inverted index, best first, as
+    ``filter_blogs()`` ranks the cached collection; only the rows of the
+    requested page are loaded.
+    """
+    category = category.lower() if category else None
+    if not search:
+        rows = _ordered()
+        if category:
+            rows = rows.filter(Category=category)
+        return Paginator(rows.values_list('data', flat=True), per_page).get_page(number)
+
+    ranked = [upstream_id for upstream_id, _ in mirror_index.search(search, category=category)]
+    page = Paginator(ranked, per_page).get_page(number)
+    found = dict(MirroredBlog.objects.filter(upstream_id__in=page.object_list).values_list('upstream_id', 'data'))
+    page.object_list = [found[upstream_id] for upstream_id in page.object_list if upstream_id in found]
+    return page
@@ -1,5 +1,32 @@
 from django.db import models
+from django.db.models import Count, F
 from django.utils import timezone
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+EXCERPT_WORDS = 40
+EXCERPT_MAX_LENGTH = 300
+
+
+def make_excerpt(content):
+    """
+    Short plain-text summary of a post body, stored for list pages
+    """
+    text = ' '.join(strip_tags(content or '').split())
+    return Truncator(Truncator(text).words(EXCERPT_WORDS)).chars(EXCERPT_MAX_LENGTH)
+
+
+class BlogQuerySet(models.QuerySet):
+    # Everything a post card needs; leaves out the full content body
+    CARD_FIELDS = (
+        'id', 'title', 'slug', 'Author_name', 'date', 'updated_at', 'image', 'image_variants', 'Category', 'excerpt',
+    )
+
+    def cards(self):
+        """
+        Load only the summary fields used to render post cards
+        """
+        return self.only(*self.CARD_FIELDS)
 
 # Create your models here.
 
@@ -16,12 +43,222 @@ class create_blog(models.Model):
         ('javascripts', 'JavaScript'),
     )
     title = models.CharField(max_length=200)
-    slug = models.SlugField(max_length=200)
+    slug = models.SlugField(max_length=200, unique=True)
     Author_name = models.CharField(max_length=100)
     date = models.DateTimeField(default=timezone.now)
     content = models.TextField()
     image = models.ImageField(upload_to='blog/images')
     Category = models.CharField(max_length=100, choices=typeofblog)
+    excerpt = models.CharField(max_length=EXCERPT_MAX_LENGTH, blank=True, editable=False)
+    # Resized/WebP copies of ``image``, filled in by blog.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Bumped on every save; cached post cards are keyed on it
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = BlogQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['Category', '-date'], name='blog_category_date_idx'),
+            models.Index(fields=['-date'], name='blog_date_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        # Categories are stored lowercase so lookups can use the index
+        # instead of Category__iexact
+        if self.Category:
+            self.Category = self.Category.strip().lower()
+        if 'content' not in self.get_deferred_fields():
+            self.excerpt = make_excerpt(self.content)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'content' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored category so BlogStats can follow changes
+        if 'Category' in field_names:
+            instance._loaded_category = instance.Category
+        return instance
     
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+
+class BlogStats(models.Model):
+    """
+    Materialized number of posts per category, kept up to date by signals
+    """
+    category = models.CharField(max_length=100, unique=True)
+    count = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.category}: {self.count}"
+    
+    @classmethod
+    def adjust(cls, category, delta):
+        """
+        Add ``delta`` to the count for ``category``
+        """
+        rows = cls.objects.filter(category=category)
+        if delta < 0:
+            rows = rows.filter(count__gte=-delta)
+        if not rows.update(count=F('count') + delta):
+            if delta > 0:
+                cls.objects.get_or_create(category=category, defaults={'count': 0})
+                cls.objects.filter(category=category).update(count=F('count') + delta)
+    
+    @classmethod
+    def recompute(cls):
+        """
+        Rebuild all counts from create_blog with a single aggregate query
+        """
+        counts = {
+            row['Category']: row['count']
+            for row in create_blog.objects.values('Category').annotate(count=Count('id')).order_by()
+        }
+        cls.objects.exclude(category__in=counts).delete()
+        for category, count in counts.items():
+            cls.objects.update_or_create(category=category, defaults={'count': count})
+        return counts
+
+
+class BlogSyncState(models.Model):
+    """
+    Last push of a local post to the REST API, so reruns can skip it
+    """
+    STATUS_SYNCED = 'synced'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_SYNCED, 'Synced'),
+        (STATUS_FAILED, 'Failed'),
+    )
+    blog = models.OneToOneField(create_blog, on_delete=models.CASCADE, related_name='sync_state')
+    # Id of the post upstream once it has been created there; later pushes update it
+    upstream_id = models.PositiveIntegerField(null=True, blank=True)
+    checksum = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    synced_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    
+    def __str__(self):
+        return f"{self.blog_id}: {self.status}"
+
+
+class SyncRun(models.Model):
+    """
+    Progress of one run of pushing local posts to the REST API
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    succeeded = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Sync run {self.pk} ({self.status})"
+    
+    @property
+    def is_active(self):
+        return self.status in (self.STATUS_QUEUED, self.STATUS_RUNNING)
+    
+    @property
+    def percent(self):
+        return int(self.processed * 100 / self.total) if self.total else 0
+
+
+class Job(models.Model):
+    """
+    A unit of background work, run by ``manage.py run_workers`` (see blog/jobs.py)
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_DEAD = 'dead'
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_DEAD, 'Dead'),
+    )
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            # Workers look for due jobs with: status = 'queued' AND run_at <= now
+            models.Index(fields=['status', 'run_at'], name='blog_job_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
+class MirroredBlog(models.Model):
+    """
+    Local copy of an upstream post, kept current by ``manage.py sync_mirror``
+    (see blog/mirror.py). ``data`` is the post exactly as the API returns
+    it; the other columns are copied out of it for indexed queries.
+    """
+    upstream_id = models.IntegerField(unique=True)
+    slug = models.SlugField(max_length=200, unique=True)
+    title = models.CharField(max_length=200, blank=True)
+    Category = models.CharField(max_length=100, blank=True)
+    date = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(null=True, blank=True)
+    data = models.JSONField(default=dict)
+    mirrored_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['Category', '-date', '-upstream_id'], name='blog_mirror_category_date_idx'),
+            models.Index(fields=['-date', '-upstream_id'], name='blog_mirror_date_idx'),
+        ]
+    
+    def __str__(self):
+        return self.title or self.slug
+
+
+class MirrorState(models.Model):
+    """
+    Where the last ``sync_mirror`` run left off (a single row)
+    """
+    # Upstream ETag of the full collection, for If-None-Match
+    etag = models.CharField(max_length=200, blank=True)
+    # Newest upstream updated_at seen, sent back as ?since=
+    cursor = models.CharField(max_length=64, blank=True)
+    synced_at = models.DateTimeField(null=True, blank=True)
+    full_synced_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Mirror synced at {self.synced_at}"
+    
+    @classmethod
+    def load(cls):
+        state, _ = cls.objects.get_or_create(pk=1)
+        return state
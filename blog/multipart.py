@@ -0,0 +1,129 @@
+"""
+Streaming ``multipart/form-data`` bodies for uploads to the REST API.
+
+``requests`` builds a multipart body from ``files=`` by reading every file
+into one ``bytes`` object, so forwarding a 50 MB photo costs at least
+50 MB of worker memory (more while it is being joined). ``MultipartStream``
+is a file-like body instead: it knows its total length up front, so the
+request still carries a ``Content-Length``, and hands out the parts a
+chunk at a time while the request is being sent, reading the files
+straight from disk or storage.
+"""
+import os
+import uuid
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _file_size(fileobj):
+    size = getattr(fileobj, 'size', None)
+    if size is not None:
+        return size
+    try:
+        return os.fstat(fileobj.fileno()).st_size - fileobj.tell()
+    except (AttributeError, OSError, ValueError):
+        position = fileobj.tell()
+        fileobj.seek(0, os.SEEK_END)
+        size = fileobj.tell() - position
+        fileobj.seek(position)
+        return size
+
+
+def _quote(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\r', '%0D').replace('\n', '%0A')
+
+
+class MultipartStream:
+    """
+    File-like ``multipart/form-data`` body over form fields and open files.
+
+    ``fields`` maps names to values; ``files`` maps names to
+    ``(filename, fileobj, content_type)`` like ``requests``' ``files=``.
+    """
+
+    def __init__(self, fields=None, files=None, boundary=None):
+        self.boundary = boundary or uuid.uuid4().hex
+        self.parts = []
+        for name, value in (fields or {}).items():
+            if value is None:
+                continue
+            self._add_bytes(
+                f'--{self.boundary}\r\n'
+                f'Content-Disposition: form-data; name="{_quote(name)}"\r\n\r\n'.encode('utf-8')
+                + str(value).encode('utf-8') + b'\r\n'
+            )
+        for name, (filename, fileobj, content_type) in (files or {}).items():
+            self._add_bytes(
+                f'--{self.boundary}\r\n'
+                f'Content-Disposition: form-data; name="{_quote(name)}"; filename="{_quote(filename)}"\r\n'
+                f'Content-Type: {content_type or "application/octet-stream"}\r\n\r\n'.encode('utf-8')
+            )
+            self.parts.append((fileobj, _file_size(fileobj), fileobj.tell()))
+            self._add_bytes(b'\r\n')
+        self._add_bytes(f'--{self.boundary}--\r\n'.encode('utf-8'))
+        self.len = sum(size for _, size, _ in self.parts)
+        self.seek(0)
+
+    def _add_bytes(self, data):
+        self.parts.append((data, len(data), 0))
+
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self):
+        return self.len
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        """
+        Move to ``offset`` (so urllib3 can rewind the body for a retry)
+        """
+        if whence == os.SEEK_CUR:
+            offset += self.position
+        elif whence == os.SEEK_END:
+            offset += self.len
+        self.position = min(max(offset, 0), self.len)
+        # Find the part holding ``position`` and the offset within it
+        skip = self.position
+        for index, (part, size, start) in enumerate(self.parts):
+            if skip < size or index == len(self.parts) - 1:
+                self._part, self._offset = index, min(skip, size)
+                if not isinstance(part, bytes):
+                    part.seek(start + self._offset)
+                break
+            skip -= size
+        return self.position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.len - self.position
+        chunks = []
+        while size > 0 and self._part < len(self.parts):
+            part, part_size, _ = self.parts[self._part]
+            wanted = min(size, part_size - self._offset)
+            if wanted <= 0:
+                # Empty file, or the end of the body
+                self._part += 1
+                self._offset = 0
+                continue
+            if isinstance(part, bytes):
+                chunk = part[self._offset:self._offset + wanted]
+            else:
+                chunk = part.read(wanted)
+            if not chunk:
+                raise IOError('File changed size while being uploaded')
+            chunks.append(chunk)
+            self._offset += len(chunk)
+            self.position += len(chunk)
+            size -= len(chunk)
+            if self._offset >= part_size:
+                self._part += 1
+                self._offset = 0
+                if self._part < len(self.parts):
+                    next_part, _, start = self.parts[self._part]
+                    if not isinstance(next_part, bytes):
+                        next_part.seek(start)
+        return b''.join(chunks)
@@ -0,0 +1,296 @@
+"""
+Full-page cache for anonymous GET requests.
+
+``@page_cache(...)`` stores a view's rendered 200 response keyed on the
+path, the query string parameters the view actually reads and the
+current *generation* of each scope it depends on (e.g. ``posts``,
+``slug:my-post``, ``category:news``). ``invalidate_pages()`` bumps those
+generations when posts change, which retires every dependent key at once
+without having to find them. Pages live in ``CACHE_ALIAS``, which may
+cull them; the generation counters live apart in
+``GENERATION_CACHE_ALIAS``, which must not, since a counter that
+disappears falls back to 0 and revives pages stored under generation 0.
+
+Only requests without a session or pending messages are served from or
+stored in the cache, and responses that set cookies other than the CSRF
+cookie, or that queued messages, are never stored. CSRF tokens are
+punched out of the cached HTML and filled in per request, so pages with
+forms can still be cached without handing one visitor's token to the
+next.
+
+Stored pages also get an ``ETag`` (a hash of the cached body) and
+``Last-Modified``, kept in a small companion key; a conditional request
+whose validators still match the current generations is answered with
+304 without loading or rendering the page. The ``api`` scope follows the
+upstream collection (``blog.api_cache.peek_stamp()``), which only moves
+when upstream content changes.
+"""
+import asyncio
+import functools
+import hashlib
+import re
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import caches
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import metrics
+from .api_cache import peek_stamp
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'GENERATION_CACHE_ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+KEY_PREFIX = 'blog:page'
+CSRF_PLACEHOLDER = '__BLOG_PAGE_CACHE_CSRF_TOKEN__'
+CSRF_INPUT_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")([^"]*)(")')
+API_SCOPE = 'api'
+
+page_cache_requests = metrics.counter(
+    'blog_page_cache_requests_total', 'Page cache lookups by view and result (hit, miss, not_modified, bypass)',
+    ['view', 'result'],
+)
+page_cache_bytes = metrics.counter(
+    'blog_page_cache_served_bytes_total', 'Response bytes served from the page cache instead of rendered',
+    ['view'],
+)
+
+
+def page_cache_settings():
+    return {**DEFAULTS, **getattr(settings, 'BLOG_PAGE_CACHE', {})}
+
+
+def _cache():
+    return caches[page_cache_settings()['CACHE_ALIAS']]
+
+
+def _generation_cache():
+    return caches[page_cache_settings()['GENERATION_CACHE_ALIAS']]
+
+
+def _generation_key(scope):
+    # Category names can contain spaces, which memcached keys can't
+    return f'{KEY_PREFIX}:gen:{quote(scope, safe=":")}'
+
+
+def invalidate_pages(slugs=(), categories=()):
+    """
+    Retire cached pages listing posts, plus those of the given slugs and categories
+    """
+    cache = _generation_cache()
+    scopes = ['posts']
+    scopes += [f'slug:{slug}' for slug in slugs if slug]
+    scopes += [f'category:{category.lower()}' for category in categories if category]
+    for scope in scopes:
+        key = _generation_key(scope)
+        # Start from a value no cached page can have been keyed on
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def _generations(names):
+    stored = _generation_cache().get_many([_generation_key(scope) for scope in names if scope != API_SCOPE])
+    return [
+        (scope, peek_stamp() if scope == API_SCOPE else stored.get(_generation_key(scope), 0))
+        for scope in names
+    ]
+
+
+def _cacheable_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    cookies = request.COOKIES
+    return settings.SESSION_COOKIE_NAME not in cookies and 'messages' not in cookies
+
+
+def _storable(request, response):
+    if response.status_code != 200 or response.streaming:
+        return False
+    if any(name != settings.CSRF_COOKIE_NAME for name in response.cookies):
+        return False
+    storage = getattr(request, '_messages', None)
+    if storage is not None and (getattr(storage, '_queued_messages', None) or getattr(storage, '_loaded_data', None)):
+        return False
+    return not response.has_header('Cache-Control') or 'private' not in response['Cache-Control']
+
+
+def _page_key(request, view_name, query_keys, generations):
+    parts = [request.path]
+    parts += [f'{key}={value}' for key in query_keys for value in request.GET.getlist(key)]
+    parts += [f'{scope}@{generation}' for scope, generation in generations]
+    digest = hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()[:32]
+    return f'{KEY_PREFIX}:{view_name}:{digest}'
+
+
+def _validators_key(key):
+    return f'{key}:validators'
+
+
+def _validators(entry):
+    # The body is hashed with the CSRF token punched out, so every visitor
+    # of the same page shares the tag; weak because the bodies differ
+    digest = hashlib.sha256(entry['content']).hexdigest()[:32]
+    return {'etag': f'W/"{digest}"', 'last_modified': int(time.time())}
+
+
+def _apply_validators(response, validators):
+    response['ETag'] = validators['etag']
+    response['Last-Modified'] = http_date(validators['last_modified'])
+    if not response.has_header('Cache-Control'):
+        # Keep the copy, but check back before reusing it
+        response['Cache-Control'] = 'no-cache'
+
+
+def _not_modified(request, validators):
+    response = get_conditional_response(
+        request, etag=validators['etag'], last_modified=validators['last_modified'],
+    )
+    if response is not None:
+        _apply_validators(response, validators)
+    return response
+
+
+def _conditional(request):
+    return 'If-None-Match' in request.headers or 'If-Modified-Since' in request.headers
+
+
+def _pack(request, response):
+    content = response.content
+    if request.META.get('CSRF_COOKIE_NEEDS_UPDATE') or request.META.get('CSRF_COOKIE_USED'):
+        text = content.decode(response.charset)
+        tokens = {match.group(2) for match in CSRF_INPUT_RE.finditer(text)}
+        text = CSRF_INPUT_RE.sub(rf'\g<1>{CSRF_PLACEHOLDER}\g<3>', text)
+        if any(token and token in text for token in tokens):
+            # The token is used somewhere we can't punch out: don't cache
+            return None
+        content = text.encode(response.charset)
+    headers = {
+        name: value for name, value in response.items()
+        if name.lower() not in ('set-cookie', 'content-length')
+    }
+    return {'status': response.status_code, 'headers': headers, 'content': content}
+
+
+def _unpack(request, entry):
+    from django.http import HttpResponse
+
+    content = entry['content']
+    if CSRF_PLACEHOLDER.encode() in content:
+        # get_token() also makes CsrfViewMiddleware send the cookie
+        content = content.replace(CSRF_PLACEHOLDER.encode(), get_token(request).encode())
+    response = HttpResponse(content, status=entry['status'])
+    for name, value in entry['headers'].items():
+        response[name] = value
+    response['X-Page-Cache'] = 'HIT'
+    return response
+
+
+def posts_scope(request, *args, **kwargs):
+    # Pages listing posts: any create, edit or delete changes them
+    return ['posts']
+
+
+def api_posts_scope(request, *args, **kwargs):
+    # Pages listing posts fetched from the upstream API
+    return ['posts', API_SCOPE]
+
+
+def no_scope(request, *args, **kwargs):
+    # Pages that don't show posts only expire with the timeout
+    return []
+
+
+def page_cache(scopes=posts_scope, query_keys=(), timeout=None):
+    """
+    Cache a view's anonymous GET responses; works on sync and async views.
+
+    ``scopes(request, *args, **kwargs)`` names what the page depends on;
+    ``query_keys`` are the GET parameters that change its content.
+    """
+    def decorator(view):
+        view_name = view.__name__
+
+        def lookup(request, args, kwargs):
+            """
+            ``(cache, key, entry, not_modified)``; the entry is only loaded
+            when the client's copy is out of date
+            """
+            cache = _cache()
+            generations = _generations(list(scopes(request, *args, **kwargs)))
+            key = _page_key(request, view_name, query_keys, generations)
+            if _conditional(request):
+                validators = cache.get(_validators_key(key))
+                if validators is not None:
+                    response = _not_modified(request, validators)
+                    if response is not None:
+                        page_cache_requests.inc(view=view_name, result='not_modified')
+                        return cache, key, None, response
+            return cache, key, cache.get(key), None
+
+        def hit(request, entry):
+            page_cache_requests.inc(view=view_name, result='hit')
+            page_cache_bytes.inc(len(entry['content']), view=view_name)
+            return _unpack(request, entry)
+
+        def store(cache, key, request, response):
+            response['X-Page-Cache'] = 'MISS'
+            page_cache_requests.inc(view=view_name, result='miss')
+            if not _storable(request, response):
+                return response
+            entry = _pack(request, response)
+            if entry is None:
+                return response
+            validators = _validators(entry)
+            _apply_validators(response, validators)
+            for name in ('ETag', 'Last-Modified', 'Cache-Control'):
+                entry['headers'][name] = response[name]
+            cache.set_many(
+                {key: entry, _validators_key(key): validators},
+                timeout or page_cache_settings()['TIMEOUT'],
+            )
+            # Re-rendered to the same bytes the client already has
+            return _not_modified(request, validators) or response
+
+        if asyncio.iscoroutinefunction(view):
+            from asgiref.sync import sync_to_async
+
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if not _cacheable_request(request):
+                    page_cache_requests.inc(view=view_name, result='bypass')
+                    return await view(request, *args, **kwargs)
+                cache, key, entry, not_modified = await sync_to_async(lookup)(request, args, kwargs)
+                if not_modified is not None:
+                    return not_modified
+                if entry is not None:
+                    return hit(request, entry)
+                response = await view(request, *args, **kwargs)
+                return await sync_to_async(store)(cache, key, request, response)
+
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _cacheable_request(request):
+                page_cache_requests.inc(view=view_name, result='bypass')
+                return view(request, *args, **kwargs)
+            cache, key, entry, not_modified = lookup(request, args, kwargs)
+            if not_modified is not None:
+                return not_modified
+            if entry is not None:
+                return hit(request, entry)
+            response = view(request, *args, **kwargs)
+            return store(cache, key, request, response)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,389 @@
+"""
+Pagination helpers for blog listings.
+
+``get_api_page()`` passes ``page``, ``page_size``, ``category`` and
+``search`` through to the upstream ``blogs/`` endpoint and expects the
+DRF-style envelope ``{"count": ..., "results": [...]}`` back, so a
+listing only ever transfers one page. When the upstream answers with a
+plain list instead, that is remembered for a while and listings are cut
+from the cached collection (``blog.api_cache``) instead. With upstream
+unreachable and nothing cached, the page comes from the local
+``create_blog`` table. Once the mirror (``blog.mirror``) has been filled,
+listings are indexed queries against it and upstream isn't asked at all.
+
+Local listings use keyset pagination (``keyset_page()``) instead.
+"""
+import bisect
+from datetime import datetime
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+from .api_cache import aget_blogs_from_api, apeek_stamp, get_blogs_from_api, peek_stamp
+from .api_client import api_settings, get_client
+from .search import snapshot_index
+
+PAGINATES_KEY = 'blog:api:paginates'
+
+# How long to trust what we learnt about upstream pagination support
+PAGINATES_TIMEOUT = 60 * 60
+
+
+class UpstreamResults:
+    """
+    Sequence stand-in that lets ``Paginator`` work from one upstream page.
+
+    ``len()`` reports the upstream ``count`` while slicing only ever
+    returns the results of the page that was actually fetched.
+    """
+
+    def __init__(self, results, count, offset):
+        self.results = results
+        self.total = count
+        self.offset = offset
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start = max((key.start or 0) - self.offset, 0)
+            stop = None if key.stop is None else max(key.stop - self.offset, 0)
+            return self.results[start:stop]
+        return self.results[key - self.offset]
+
+
+def _page_number(number):
+    try:
+        return max(int(number), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def _page_params(number, per_page, filters):
+    params = {'page': number, 'page_size': per_page}
+    params.update({key: value for key, value in filters.items() if value})
+    return params
+
+
+def _page_result(response):
+    if response.status_code != 200:
+        return response.status_code, None
+    return 200, response.json()
+
+
+def _fetch_page(number, per_page, filters):
+    """
+    ``(status, data)`` for one upstream page; status is None when the request failed
+    """
+    try:
+        return _page_result(get_client().get('blogs/', params=_page_params(number, per_page, filters)))
+    except (requests.RequestException, ValueError):
+        return None, None
+
+
+def _is_envelope(data):
+    return isinstance(data, dict) and 'results' in data and 'count' in data
+
+
+def filter_blogs(blogs, category=None, search=None, stamp=None):
+    """
+    Filter a list of posts by category, and by search text through the
+    snapshot index (``stamp`` identifies the snapshot ``blogs`` came from)
+    """
+    if category and blogs:
+        blogs = [blog for blog in blogs if blog.get('Category', '').lower() == category.lower()]
+
+    if search and blogs:
+        blogs = snapshot_index.search(blogs, search, stamp=stamp)
+    return blogs
+
+
+def _envelope_paginator(data, number, per_page):
+    return Paginator(UpstreamResults(data['results'], data['count'], (number - 1) * per_page), per_page)
+
+
+def _collection_page(api_data, number, per_page, category, search, stamp):
+    blogs = []
+    if api_data and 'results' in api_data:
+        blogs = api_data['results']
+    elif api_data and isinstance(api_data, list):
+        blogs = api_data
+    blogs = filter_blogs(blogs, category, search, stamp=stamp)
+    return Paginator(blogs, per_page).get_page(number)
+
+
+def _local_page(number, per_page, category, search):
+    from .models import create_blog
+
+    blogs = create_blog.objects.cards().order_by('-date', '-id')
+    if category:
+        blogs = blogs.filter(Category=category.lower())
+    if search:
+        blogs = blogs.filter(Q(title__icontains=search) | Q(excerpt__icontains=search))
+    return Paginator(blogs, per_page).get_page(number)
+
+
+def get_api_page(number, per_page, category=None, search=None):
+    """
+    Return a ``Page`` of upstream posts, paginated and filtered upstream if possible
+    """
+    from . import mirror
+
+    if mirror.ready():
+        return mirror.page(number, per_page, category, search)
+
+    cache = caches[api_settings()['CACHE_ALIAS']]
+    requested = number = _page_number(number)
+    filters = {'category': category, 'search': search}
+
+    if cache.get(PAGINATES_KEY) is not False:
+        status, data = _fetch_page(number, per_page, filters)
+        if status == 404 and number > 1:
+            # DRF answers 404 for out-of-range pages; learn the count from page 1
+            number = 1
+            status, data = _fetch_page(number, per_page, filters)
+        if _is_envelope(data):
+            cache.set(PAGINATES_KEY, True, PAGINATES_TIMEOUT)
+            paginator = _envelope_paginator(data, number, per_page)
+            if number > paginator.num_pages:
+                number = paginator.num_pages
+                data = _fetch_page(number, per_page, filters)
+                if not _is_envelope(data):
+                    data = {'results': [], 'count': 0}
+                paginator = _envelope_paginator(data, number, per_page)
+            return paginator.get_page(number)
+        if isinstance(data, list):
+            cache.set(PAGINATES_KEY, False, PAGINATES_TIMEOUT)
+
+    # Upstream doesn't paginate (or is down): cut the page from the cached collection
+    number = requested
+    api_data = get_blogs_from_api()
+    if api_data is None:
+        return _local_page(number, per_page, category, search)
+    return _collection_page(api_data, number, per_page, category, search, peek_stamp())
+
+
+async def _afetch_page(number, per_page, filters):
+    from .async_api import get_async_client
+
+    try:
+        return _page_result(await get_async_client().get('blogs/', params=_page_params(number, per_page, filters)))
+    except (requests.RequestException, ValueError):
+        return None, None
+
+
+async def aget_api_page(number, per_page, category=None, search=None):
+    """
+    Async counterpart of ``get_api_page()``
+    """
+    from . import mirror
+
+    if await sync_to_async(mirror.ready)():
+        return await sync_to_async(mirror.page)(number, per_page, category, search)
+
+    cache = caches[api_settings()['CACHE_ALIAS']]
+    requested = number = _page_number(number)
+    filters = {'category': category, 'search': search}
+
+    if await cache.aget(PAGINATES_KEY) is not False:
+        status, data = await _afetch_page(number, per_page, filters)
+        if status == 404 and number > 1:
+            number = 1
+            status, data = await _afetch_page(number, per_page, filters)
+        if _is_envelope(data):
+            await cache.aset(PAGINATES_KEY, True, PAGINATES_TIMEOUT)
+            paginator = _envelope_paginator(data, number, per_page)
+            if number > paginator.num_pages:
+                number = paginator.num_pages
+                data = await _afetch_page(number, per_page, filters)
+                if not _is_envelope(data):
+                    data = {'results': [], 'count': 0}
+                paginator = _envelope_paginator(data, number, per_page)
+            return paginator.get_page(number)
+        if isinstance(data, list):
+            await cache.aset(PAGINATES_KEY, False, PAGINATES_TIMEOUT)
+
+    number = requested
+    api_data = await aget_blogs_from_api()
+    if api_data is None:
+        return await sync_to_async(_local_page)(number, per_page, category, search)
+    return _collection_page(api_data, number, per_page, category, search, await apeek_stamp())
+
+
+# Keyset (cursor) pagination for local querysets
+#
+# Instead of OFFSET, each page remembers the sort key of its first and last
+# row in an opaque signed token, and the next query starts right after it
+# with an indexed range condition. Page 1000 costs the same as page 1.
+# Tokens are signed per sort field, so a search cursor (a score) can't be
+# replayed against a date-ordered listing, and the other way round.
+
+CURSOR_SALT = 'blog.pagination.cursor'
+
+
+def max_page_size():
+    return getattr(settings, 'BLOG_MAX_PAGE_SIZE', 50)
+
+
+def clamp_page_size(value, default):
+    """
+    Parse a page size from the query string, bounded by BLOG_MAX_PAGE_SIZE
+    """
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        value = default
+    return min(max(value, 1), max_page_size())
+
+
+def _cursor_salt(field):
+    return f'{CURSOR_SALT}:{field}'
+
+
+def _key_value(value):
+    # Datetimes travel as ISO strings inside the token
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _parse_key_value(value, field):
+    """
+    The sort value carried by a cursor, or None when it doesn't fit ``field``
+    """
+    if field == 'date':
+        if not isinstance(value, str):
+            return None
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    # Any other keyset field is a number (rank, score)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return value
+
+
+def encode_cursor(key, direction, field):
+    return signing.dumps({'k': key, 'd': direction}, salt=_cursor_salt(field), compress=True)
+
+
+def decode_cursor(token, field):
+    """
+    Return ``((value, id), direction)`` for a cursor token of a listing
+    ordered by ``field``, or None if it is missing or invalid
+    """
+    if not token:
+        return None
+    try:
+        data = signing.loads(token, salt=_cursor_salt(field))
+        key, direction = data['k'], data['d']
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None
+    if direction not in ('next', 'prev') or not isinstance(key, list) or len(key) != 2:
+        return None
+    value, pk = _parse_key_value(key[0], field), key[1]
+    if value is None or isinstance(pk, bool) or not isinstance(pk, int):
+        return None
+    return (value, pk), direction
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated listing, usable like a ``Page`` in templates
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def keyset_page(queryset, cursor, page_size, field='date', descending=True):
+    """
+    Return a ``KeysetPage`` of ``queryset`` ordered by ``(field, id)``.
+
+    ``descending`` orders newest (largest) first; ties on ``field`` are
+    broken by ``id`` in the same direction.
+    """
+    position = decode_cursor(cursor, field)
+    backwards = position is not None and position[1] == 'prev'
+    # Walk forwards in display order, or backwards from a "previous" cursor
+    walk_descending = descending != backwards
+    ordering = [f'-{field}', '-id'] if walk_descending else [field, 'id']
+    queryset = queryset.order_by(*ordering)
+
+    if position is not None:
+        (value, pk), _ = position
+        beyond = 'lt' if walk_descending else 'gt'
+        queryset = queryset.filter(
+            Q(**{f'{field}__{beyond}': value}) | Q(**{field: value, f'id__{beyond}': pk})
+        )
+
+    rows = list(queryset[:page_size + 1])
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+        has_next, has_previous = True, more
+    else:
+        has_next, has_previous = more, position is not None
+
+    def cursor_for(row, direction):
+        return encode_cursor([_key_value(getattr(row, field)), row.pk], direction, field)
+
+    return KeysetPage(
+        rows,
+        next_cursor=cursor_for(rows[-1], 'next') if rows and has_next else None,
+        previous_cursor=cursor_for(rows[0], 'prev') if rows and has_previous else None,
+    )
+
+
+def keyset_list_page(ranked, cursor, page_size):
+    """
+    Keyset pagination over an in-memory ``[(id, score), ...]`` list, best first
+    """
+    ordered = sorted(ranked, key=lambda item: (-item[1], -item[0]))
+    keys = [(-score, -pk) for pk, score in ordered]
+    position = decode_cursor(cursor, 'score')
+    if position is None:
+        start = 0
+        end = page_size
+    else:
+        (score, pk), direction = position
+        if direction == 'next':
+            start = bisect.bisect_right(keys, (-score, -pk))
+            end = start + page_size
+        else:
+            end = bisect.bisect_left(keys, (-score, -pk))
+            start = max(end - page_size, 0)
+    items = ordered[start:end]
+    has_next = end < len(ordered)
+    has_previous = start > 0
+    return KeysetPage(
+        items,
+        next_cursor=encode_cursor([items[-1][1], items[-1][0]], 'next', 'score') if items and has_next else None,
+        previous_cursor=encode_cursor([items[0][1], items[0][0]], 'prev', 'score') if items and has_previous else None,
+    )
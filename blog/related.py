@@ -0,0 +1,89 @@
+"""
+In-process category -> posts index used for "related posts".
+
+The index is built from the cached upstream collection (see
+``blog.api_cache``) and only re-synced when a newer snapshot appears. A
+re-sync diffs the snapshot against what is indexed and rebuilds just the
+categories whose posts changed, so a detail page never downloads the
+collection to find three related posts.
+"""
+import threading
+
+
+class CategoryIndex:
+    """
+    Map each category to the slugs of its posts, in upstream order
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stamp = None
+        self.posts = {}
+        self.order = []
+        self.by_category = {}
+
+    def sync(self, posts, stamp):
+        """
+        Bring the index up to date with a snapshot fetched at ``stamp``
+        """
+        if stamp is not None and stamp == self.stamp:
+            return
+        with self._lock:
+            if stamp is not None and stamp == self.stamp:
+                return
+            incoming = {post.get('slug'): post for post in posts if post.get('slug')}
+            touched = set()
+            for slug, post in self.posts.items():
+                new = incoming.get(slug)
+                if new is None or new != post:
+                    touched.add(post.get('Category'))
+            for slug, post in incoming.items():
+                if self.posts.get(slug) != post:
+                    touched.add(post.get('Category'))
+
+            order = list(incoming)
+            if order != self.order:
+                touched.update(post.get('Category') for post in incoming.values())
+            for category in touched:
+                slugs = [slug for slug in order if incoming[slug].get('Category') == category]
+                if slugs:
+                    self.by_category[category] = slugs
+                else:
+                    self.by_category.pop(category, None)
+
+            self.posts = incoming
+            self.order = order
+            self.stamp = stamp
+
+    def get(self, slug):
+        return self.posts.get(slug)
+
+    def discard(self, slug):
+        """
+        Drop a post that was deleted before the next snapshot arrives
+        """
+        with self._lock:
+            post = self.posts.pop(slug, None)
+            if post is not None:
+                category = post.get('Category')
+                slugs = [s for s in self.by_category.get(category, []) if s != slug]
+                self.by_category[category] = slugs
+                self.order = [s for s in self.order if s != slug]
+
+    def related(self, category, exclude_slug=None, limit=3):
+        """
+        Return up to ``limit`` posts in ``category``, skipping ``exclude_slug``
+        """
+        related = []
+        for slug in self.by_category.get(category, []):
+            if slug == exclude_slug:
+                continue
+            post = self.posts.get(slug)
+            if post is not None:
+                related.append(post)
+            if len(related) >= limit:
+                break
+        return related
+
+
+related_index = CategoryIndex()
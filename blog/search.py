@@ -0,0 +1,266 @@
+"""
+In-process inverted index for blog search.
+
+Posts are tokenized over ``title``, ``content`` and ``Author_name`` and
+each token keeps a posting list of ``{doc_id: score}``. A query looks up
+its tokens (as prefixes, so ``prog`` finds ``programming``) and only
+touches the posting lists it needs, so latency follows the number of
+matches rather than the size of the corpus. Title hits outrank author
+hits, which outrank body hits.
+
+``blog_index`` mirrors the local ``create_blog`` table and is kept up to
+date by the signals in ``blog.signals``; ``mirror_index`` covers the
+upstream posts in ``MirroredBlog`` and is updated by ``blog.mirror``;
+``snapshot_index`` covers the cached upstream collection used by
+``blog_list``.
+"""
+import bisect
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+
+TOKEN_RE = re.compile(r'\w+')
+
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'Author_name': 2.0,
+    'content': 1.0,
+}
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+class InvertedIndex:
+    """
+    Token -> ``{doc_id: score}`` posting lists with prefix lookup
+    """
+
+    def __init__(self, field_weights=None):
+        self.field_weights = field_weights or FIELD_WEIGHTS
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.postings = defaultdict(dict)
+            self.doc_terms = {}
+            self.terms = []
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    def _score(self, document):
+        scores = Counter()
+        for field, weight in self.field_weights.items():
+            for token, tf in Counter(tokenize(document.get(field))).items():
+                scores[token] += weight * (1 + math.log(tf))
+        return scores
+
+    def add(self, doc_id, document):
+        """
+        Index (or re-index) ``document``, a mapping of field name to text
+        """
+        scores = self._score(document)
+        with self._lock:
+            self._remove(doc_id)
+            for token, score in scores.items():
+                if token not in self.postings:
+                    bisect.insort(self.terms, token)
+                self.postings[token][doc_id] = score
+            self.doc_terms[doc_id] = set(scores)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        for token in self.doc_terms.pop(doc_id, ()):
+            posting = self.postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(doc_id, None)
+            if not posting:
+                del self.postings[token]
+                i = bisect.bisect_left(self.terms, token)
+                if i < len(self.terms) and self.terms[i] == token:
+                    del self.terms[i]
+
+    def _prefix_matches(self, prefix):
+        matches = {}
+        i = bisect.bisect_left(self.terms, prefix)
+        while i < len(self.terms) and self.terms[i].startswith(prefix):
+            for doc_id, score in self.postings[self.terms[i]].items():
+                # An exact token match counts fully, a prefix match half
+                weight = score if self.terms[i] == prefix else score / 2
+                if weight > matches.get(doc_id, 0):
+                    matches[doc_id] = weight
+            i += 1
+        return matches
+
+    def search(self, query):
+        """
+        Return ``[(doc_id, score), ...]`` for docs matching every query token, best first
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        with self._lock:
+            per_token = sorted((self._prefix_matches(token) for token in tokens), key=len)
+        if not per_token[0]:
+            return []
+        results = dict(per_token[0])
+        for matches in per_token[1:]:
+            results = {doc_id: score + matches[doc_id] for doc_id, score in results.items() if doc_id in matches}
+            if not results:
+                return []
+        return sorted(results.items(), key=lambda item: item[1], reverse=True)
+
+
+class ModelSearchIndex:
+    """
+    Inverted index over ``create_blog``, loaded lazily from the database.
+
+    Each write bumps a generation counter in the cache, so other worker
+    processes notice that their copy is out of date and reload it.
+    """
+
+    GENERATION_KEY = 'blog:search:generation'
+    FIELDS = ('title', 'content', 'Author_name')
+
+    def __init__(self):
+        self.index = InvertedIndex()
+        self.generation = None
+        self._lock = threading.Lock()
+
+    def _current_generation(self):
+        cache.add(self.GENERATION_KEY, 0, None)
+        return cache.get(self.GENERATION_KEY, 0)
+
+    def documents(self):
+        """
+        ``(doc_id, document)`` for everything the index covers
+        """
+        from .models import create_blog
+
+        rows = create_blog.objects.values_list('id', *self.FIELDS).iterator(chunk_size=2000)
+        for row in rows:
+            yield row[0], dict(zip(self.FIELDS, row[1:]))
+
+    def rebuild(self):
+        with self._lock:
+            generation = self._current_generation()
+            self.index.clear()
+            for doc_id, document in self.documents():
+                self.index.add(doc_id, document)
+            self.generation = generation
+
+    def ensure_current(self):
+        if self.generation is None or self.generation != self._current_generation():
+            self.rebuild()
+
+    def _bump(self):
+        self._current_generation()
+        generation = cache.incr(self.GENERATION_KEY)
+        # Only skip the reload if nobody else wrote since we last loaded
+        if self.generation is not None and generation == self.generation + 1:
+            self.generation = generation
+
+    def update(self, blog):
+        if self.generation is not None:
+            self.index.add(blog.pk, {field: getattr(blog, field) for field in self.FIELDS})
+        self._bump()
+
+    def remove(self, pk):
+        if self.generation is not None:
+            self.index.remove(pk)
+        self._bump()
+
+    def search(self, query):
+        self.ensure_current()
+        return self.index.search(query)
+
+
+class MirrorSearchIndex(ModelSearchIndex):
+    """
+    Inverted index over the mirrored upstream posts, keyed by upstream id
+    """
+
+    GENERATION_KEY = 'blog:search:mirror:generation'
+
+    def __init__(self):
+        super().__init__()
+        self.categories = {}
+
+    def documents(self):
+        from .models import MirroredBlog
+
+        self.categories = {}
+        rows = MirroredBlog.objects.values_list('upstream_id', 'Category', 'data').iterator(chunk_size=2000)
+        for upstream_id, category, data in rows:
+            self.categories[upstream_id] = category
+            yield upstream_id, {field: data.get(field) for field in self.FIELDS}
+
+    def update(self, posts):
+        """
+        Index ``[(upstream_id, category, data), ...]`` just written to the mirror
+        """
+        if self.generation is not None:
+            for upstream_id, category, data in posts:
+                self.categories[upstream_id] = category
+                self.index.add(upstream_id, {field: data.get(field) for field in self.FIELDS})
+        self._bump()
+
+    def remove(self, upstream_ids):
+        if self.generation is not None:
+            for upstream_id in upstream_ids:
+                self.categories.pop(upstream_id, None)
+                self.index.remove(upstream_id)
+        self._bump()
+
+    def search(self, query, category=None):
+        """
+        ``[(upstream_id, score), ...]`` best first, optionally within ``category``
+        """
+        results = super().search(query)
+        if category:
+            results = [item for item in results if self.categories.get(item[0]) == category]
+        return results
+
+
+class SnapshotSearchIndex:
+    """
+    Inverted index over a list of upstream posts, keyed by slug
+    """
+
+    def __init__(self):
+        self.index = InvertedIndex()
+        self.stamp = None
+        self._lock = threading.Lock()
+
+    def sync(self, posts, stamp):
+        if stamp is not None and stamp == self.stamp:
+            return
+        with self._lock:
+            self.index.clear()
+            for post in posts:
+                if post.get('slug'):
+                    self.index.add(post['slug'], post)
+            self.stamp = stamp
+
+    def search(self, posts, query, stamp=None):
+        """
+        Return the posts matching ``query``, best first
+        """
+        self.sync(posts, stamp)
+        by_slug = {post.get('slug'): post for post in posts}
+        return [by_slug[slug] for slug, _ in self.index.search(query) if slug in by_slug]
+
+
+blog_index = ModelSearchIndex()
+mirror_index = MirrorSearchIndex()
+snapshot_index = SnapshotSearchIndex()
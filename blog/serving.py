@@ -0,0 +1,192 @@
+"""
+Serving media (and, without a front-end server, static) files.
+
+``serve_file()`` answers conditional requests (``ETag`` /
+``Last-Modified`` -> 304), single byte ranges (206) and, for static
+files, picks a precompressed ``.br``/``.gz`` sibling written by
+``blog.storage``. With ``BLOG_SENDFILE['BACKEND']`` set to
+``'x-accel-redirect'`` (nginx) or ``'x-sendfile'`` (Apache, lighttpd)
+the file itself is left to the web server, so workers never copy image
+bytes.
+
+Content-hashed names (manifest static files, ``blog/derived/`` media) are
+sent with a one-year ``immutable`` ``Cache-Control``.
+"""
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from .images import DERIVED_ROOT
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+MEDIA_CACHE_CONTROL = 'public, max-age=86400'
+STATIC_CACHE_CONTROL = 'public, max-age=3600'
+
+# ManifestStaticFilesStorage names look like styles.1a2b3c4d5e6f.css
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+CHUNK_SIZE = 64 * 1024
+
+
+def sendfile_settings():
+    return {'BACKEND': None, 'ROOTS': {}, **getattr(settings, 'BLOG_SENDFILE', {})}
+
+
+def _etag(st, suffix=''):
+    return f'"{int(st.st_mtime):x}-{st.st_size:x}{suffix}"'
+
+
+def _byte_range(header, size):
+    """
+    Parse a single ``Range: bytes=...`` header into ``(start, end)``,
+    inclusive; None to ignore it, or False when it can't be satisfied
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    start, end = match.groups()
+    if not start:
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _sendfile_response(path, document_root):
+    options = sendfile_settings()
+    backend = options['BACKEND']
+    if not backend:
+        return None
+    response = HttpResponse()
+    if backend == 'x-sendfile':
+        response['X-Sendfile'] = path
+    elif backend == 'x-accel-redirect':
+        # nginx maps an internal location onto the same directory
+        location = options['ROOTS'].get(str(document_root))
+        if location is None:
+            return None
+        relative = os.path.relpath(path, document_root).replace(os.sep, '/')
+        response['X-Accel-Redirect'] = f"{location.rstrip('/')}/{relative}"
+    else:
+        raise ValueError(f"Unknown BLOG_SENDFILE backend: {backend}")
+    # Let the web server fill these in from the file
+    del response['Content-Type']
+    return response
+
+
+def serve_file(request, path, document_root, cache_control, precompressed=False):
+    """
+    Serve ``path`` from under ``document_root``
+    """
+    try:
+        fullpath = safe_join(document_root, path)
+    except SuspiciousFileOperation:
+        raise Http404('Invalid path')
+    try:
+        st = os.stat(fullpath)
+    except OSError:
+        raise Http404('File not found')
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404('File not found')
+
+    content_type, _ = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+
+    handoff = _sendfile_response(fullpath, document_root)
+    if handoff is not None:
+        handoff['Cache-Control'] = cache_control
+        return handoff
+
+    encoding = None
+    if precompressed:
+        accepted = request.headers.get('Accept-Encoding', '')
+        for name, suffix in ENCODINGS:
+            if name in accepted and os.path.isfile(fullpath + suffix):
+                encoding, fullpath = name, fullpath + suffix
+                st = os.stat(fullpath)
+                break
+
+    etag = _etag(st, f'-{encoding}' if encoding else '')
+    response = get_conditional_response(request, etag=etag, last_modified=int(st.st_mtime))
+    if response is None:
+        byte_range = None
+        if not encoding and 'Range' in request.headers:
+            if_range = request.headers.get('If-Range')
+            if not if_range or if_range == etag:
+                byte_range = _byte_range(request.headers['Range'], st.st_size)
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{st.st_size}'
+            return response
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                _read_range(fullpath, start, length), status=206, content_type=content_type,
+            )
+            response['Content-Length'] = str(length)
+            response['Content-Range'] = f'bytes {start}-{end}/{st.st_size}'
+        else:
+            response = FileResponse(open(fullpath, 'rb'), content_type=content_type)
+            # FileResponse names the file; for inline assets that's just noise
+            del response['Content-Disposition']
+            if encoding:
+                response['Content-Encoding'] = encoding
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(st.st_mtime)
+    response['Cache-Control'] = cache_control
+    response['Accept-Ranges'] = 'bytes'
+    if precompressed:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def serve_media(request, path):
+    """
+    Serve an uploaded file or image derivative from MEDIA_ROOT
+    """
+    immutable = path.startswith(f'{DERIVED_ROOT}/')
+    return serve_file(request, path, settings.MEDIA_ROOT, IMMUTABLE if immutable else MEDIA_CACHE_CONTROL)
+
+
+def serve_static(request, path):
+    """
+    Serve a collected static file from STATIC_ROOT, precompressed if possible
+    """
+    immutable = HASHED_NAME_RE.search(path) is not None
+    return serve_file(
+        request, path, settings.STATIC_ROOT,
+        IMMUTABLE if immutable else STATIC_CACHE_CONTROL,
+        precompressed=True,
+    )
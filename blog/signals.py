@@ -0,0 +1,76 @@
+"""
+Signal handlers keeping derived data in step with ``create_blog``
+"""
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from . import fts
+from .images import needs_variants
+from .models import BlogStats, create_blog
+from .page_cache import invalidate_pages
+from .search import blog_index
+
+
+@receiver(post_save, sender=create_blog)
+def index_blog(sender, instance, **kwargs):
+    blog_index.update(instance)
+
+
+@receiver(post_delete, sender=create_blog)
+def unindex_blog(sender, instance, **kwargs):
+    blog_index.remove(instance.pk)
+
+
+@receiver(post_save, sender=create_blog)
+def invalidate_blog_pages(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Runs before count_blog, while _loaded_category is still the old value
+    invalidate_pages(
+        slugs=[instance.slug],
+        categories=[getattr(instance, '_loaded_category', None), instance.Category],
+    )
+
+
+@receiver(post_delete, sender=create_blog)
+def invalidate_deleted_blog_pages(sender, instance, **kwargs):
+    invalidate_pages(slugs=[instance.slug], categories=[instance.Category])
+
+
+@receiver(post_save, sender=create_blog)
+def count_blog(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_loaded_category', None)
+    if created:
+        BlogStats.adjust(instance.Category, 1)
+    elif previous is not None and previous != instance.Category:
+        BlogStats.adjust(previous, -1)
+        BlogStats.adjust(instance.Category, 1)
+    instance._loaded_category = instance.Category
+
+
+@receiver(post_delete, sender=create_blog)
+def uncount_blog(sender, instance, **kwargs):
+    BlogStats.adjust(getattr(instance, '_loaded_category', instance.Category), -1)
+
+
+@receiver(post_save, sender=create_blog)
+def queue_image_variants(sender, instance, raw=False, **kwargs):
+    if raw or 'image' in instance.get_deferred_fields() or not needs_variants(instance):
+        return
+    from .tasks import queue_image_variants as enqueue_variants
+
+    # Resizing is slow; a background worker builds the derivatives
+    transaction.on_commit(lambda: enqueue_variants(instance.pk))
+
+
+@receiver(post_migrate)
+def reinstall_fts_triggers(sender, using, **kwargs):
+    # Table rebuilds during migrations drop the FTS triggers
+    if sender.name != 'blog':
+        return
+    connection = connections[using]
+    if fts.supported(connection) and create_blog._meta.db_table in connection.introspection.table_names():
+        fts.install(connection)
@@ -0,0 +1,67 @@
+"""
+Static files storage for production.
+
+``CompressedManifestStaticFilesStorage`` is Django's manifest storage
+(file names carry a hash of their content, so they can be cached
+forever) that also writes ``.gz`` and, when the ``brotli`` package is
+installed, ``.br`` siblings of every text asset during ``collectstatic``.
+``blog.serving`` (or the front-end web server) picks the sibling that
+matches the request's ``Accept-Encoding``.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESS_EXTENSIONS = ('.css', '.js', '.mjs', '.svg', '.json', '.map', '.txt', '.xml', '.html', '.ico')
+
+# Smaller files gain next to nothing from compression
+MIN_COMPRESS_SIZE = 256
+
+
+def _write_if_smaller(path, original_size, data):
+    # Keep a sibling only when it saves at least 5%
+    if len(data) < original_size * 0.95:
+        with open(path, 'wb') as f:
+            f.write(data)
+        return True
+    return False
+
+
+def compress_file(path):
+    """
+    Write ``path.gz`` (and ``path.br``) next to ``path``; returns the suffixes written
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return []
+    written = []
+    if _write_if_smaller(f'{path}.gz', len(data), gzip.compress(data, compresslevel=9, mtime=0)):
+        written.append('.gz')
+    if brotli is not None and _write_if_smaller(f'{path}.br', len(data), brotli.compress(data)):
+        written.append('.br')
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Hashed file names plus precompressed ``.gz``/``.br`` siblings
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = []
+        for name, hashed_name, processed in super().post_process(paths, dry_run=dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.append(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for hashed_name in hashed_names:
+            if os.path.splitext(hashed_name)[1].lower() in COMPRESS_EXTENSIONS:
+                compress_file(self.path(hashed_name))
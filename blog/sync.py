@@ -0,0 +1,208 @@
+"""
+Push local ``create_blog`` posts to the upstream REST API.
+
+Rows are streamed with ``.iterator(chunk_size=...)`` rather than loaded at
+once, posted through a bounded thread pool (or a bulk endpoint, when the
+upstream has one) and recorded in ``BlogSyncState``. A post whose
+checksum matches its last successful push is skipped, so a rerun only
+sends new or changed posts. The upstream id is kept from the first push
+and changed posts are PUT to ``blogs/<id>/`` rather than created again.
+Progress is written to a ``SyncRun`` row.
+"""
+import hashlib
+import mimetypes
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.utils import timezone
+
+from .api_cache import invalidate_blogs
+from . import mirror
+from .api_client import api_settings, get_client
+from .models import BlogSyncState, SyncRun, create_blog
+from .page_cache import invalidate_pages
+
+SYNC_FIELDS = ('title', 'slug', 'Author_name', 'content', 'Category')
+
+
+def blog_payload(blog):
+    return {field: getattr(blog, field) for field in SYNC_FIELDS}
+
+
+def blog_checksum(blog):
+    digest = hashlib.sha256()
+    for value in blog_payload(blog).values():
+        digest.update(str(value).encode('utf-8'))
+        digest.update(b'\0')
+    digest.update((blog.image.name or '').encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _answer(response):
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def _upstream_id(blog):
+    state = getattr(blog, 'sync_state', None)
+    return state.upstream_id if state is not None else None
+
+
+def push_blog(blog):
+    """
+    Send one post, with its image file, to the API; returns ``(ok, error, answer)``.
+
+    A post already created upstream is updated in place. ``answer`` is the
+    decoded response body; it is left to the caller to record, so pushing
+    threads never write to the database.
+    """
+    image = None
+    try:
+        files = None
+        if blog.image:
+            try:
+                image = blog.image.storage.open(blog.image.name, 'rb')
+            except OSError:
+                image = None
+            if image is not None:
+                content_type = mimetypes.guess_type(blog.image.name)[0] or 'application/octet-stream'
+                files = {'image': (os.path.basename(blog.image.name), image, content_type)}
+        upstream_id = _upstream_id(blog)
+        response = None
+        if upstream_id is not None:
+            response = get_client().upload('PUT', f'blogs/{upstream_id}/', data=blog_payload(blog), files=files)
+            if response.status_code == 404:
+                # Deleted upstream: create it again
+                response = None
+                if image is not None:
+                    image.seek(0)
+        if response is None:
+            response = get_client().upload('POST', 'blogs/', data=blog_payload(blog), files=files)
+        if response.status_code in [200, 201]:
+            return True, '', _answer(response)
+        return False, f'{response.status_code}: {response.text[:500]}', None
+    except requests.RequestException as e:
+        return False, str(e), None
+    finally:
+        if image is not None:
+            image.close()
+
+
+def push_bulk(blogs, endpoint):
+    """
+    POST a batch of new posts (without images) to a bulk endpoint
+    """
+    try:
+        response = get_client().post(endpoint, json=[blog_payload(blog) for blog in blogs])
+        if response.status_code in [200, 201]:
+            answers = _answer(response)
+            if not isinstance(answers, list) or len(answers) != len(blogs):
+                answers = [None] * len(blogs)
+            return [(True, '', answer) for answer in answers]
+        error = f'{response.status_code}: {response.text[:500]}'
+    except requests.RequestException as e:
+        error = str(e)
+    return [(False, error, None)] * len(blogs)
+
+
+def _pending(force):
+    """
+    Stream ``(blog, checksum)`` for posts that are new or changed since their last push
+    """
+    rows = create_blog.objects.select_related('sync_state').order_by('id')
+    for blog in rows.iterator(chunk_size=api_settings()['SYNC_CHUNK_SIZE']):
+        checksum = blog_checksum(blog)
+        state = getattr(blog, 'sync_state', None)
+        if force or state is None or state.status != BlogSyncState.STATUS_SYNCED or state.checksum != checksum:
+            yield blog, checksum
+        else:
+            yield blog, None
+
+
+def _record(blog, checksum, ok, error, answer):
+    defaults = {
+        'checksum': checksum,
+        'status': BlogSyncState.STATUS_SYNCED if ok else BlogSyncState.STATUS_FAILED,
+        'synced_at': timezone.now() if ok else None,
+        'error': error,
+    }
+    if isinstance(answer, dict) and answer.get('id') is not None:
+        defaults['upstream_id'] = answer['id']
+    BlogSyncState.objects.update_or_create(blog=blog, defaults=defaults)
+    if ok and isinstance(answer, dict):
+        mirror.record({**blog_payload(blog), **answer})
+
+
+def sync_blogs(run=None, workers=None, force=False, bulk=False, progress=None):
+    """
+    Push new and changed posts to the API and return the ``SyncRun``.
+
+    ``workers`` bounds concurrent uploads; ``bulk`` sends batches of new
+    posts to ``BLOG_API['BULK_ENDPOINT']`` instead (images are not
+    included). Posts already created upstream are always updated one by one.
+    """
+    options = api_settings()
+    workers = workers or options['SYNC_WORKERS']
+    batch_size = options['SYNC_CHUNK_SIZE']
+    bulk_endpoint = options.get('BULK_ENDPOINT') if bulk else None
+
+    run = run or SyncRun.objects.create()
+    run.status = SyncRun.STATUS_RUNNING
+    run.total = create_blog.objects.count()
+    # A retried run starts counting again; already-synced posts are skipped
+    run.processed = run.succeeded = run.failed = run.skipped = 0
+    run.error = ''
+    run.save()
+
+    def flush(batch, executor):
+        blogs = [blog for blog, _ in batch]
+        if bulk_endpoint:
+            new = [blog for blog in blogs if _upstream_id(blog) is None]
+            results = dict(zip(new, push_bulk(new, bulk_endpoint))) if new else {}
+            existing = [blog for blog in blogs if blog not in results]
+            results.update(zip(existing, executor.map(push_blog, existing)))
+            results = [results[blog] for blog in blogs]
+        else:
+            results = list(executor.map(push_blog, blogs))
+        # Sync state and the mirror are written from this thread only, one row at a time
+        for (blog, checksum), (ok, error, answer) in zip(batch, results):
+            _record(blog, checksum, ok, error, answer)
+            run.processed += 1
+            if ok:
+                run.succeeded += 1
+            else:
+                run.failed += 1
+        run.save(update_fields=['processed', 'succeeded', 'failed', 'skipped'])
+        if progress:
+            progress(run)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='blog-sync') as executor:
+            batch = []
+            for blog, checksum in _pending(force):
+                if checksum is None:
+                    run.processed += 1
+                    run.skipped += 1
+                    continue
+                batch.append((blog, checksum))
+                if len(batch) >= batch_size:
+                    flush(batch, executor)
+                    batch = []
+            if batch:
+                flush(batch, executor)
+        run.status = SyncRun.STATUS_DONE
+    except Exception as e:
+        run.status = SyncRun.STATUS_FAILED
+        run.error = str(e)
+        raise
+    finally:
+        run.finished_at = timezone.now()
+        run.save()
+        if run.succeeded:
+            invalidate_blogs()
+            invalidate_pages()
+    return run
+
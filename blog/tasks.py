@@ -0,0 +1,145 @@
+"""
+Background tasks run by ``manage.py run_workers`` (see blog/jobs.py).
+
+Uploads that have to reach the REST API are first staged so the request
+can return; the job forwards the staged file and deletes it once the API
+has accepted it, or once the job is dead. Staged files live under
+``BLOG_UPLOAD_STAGING_ROOT``, outside MEDIA_ROOT, so unprocessed uploads
+are never served by ``blog.serving``.
+"""
+import mimetypes
+import os
+import tempfile
+import uuid
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.mail import EmailMessage
+
+from .api_cache import invalidate_blogs
+from . import mirror
+from .api_client import get_client
+from .images import needs_variants, update_variants
+from .jobs import enqueue, task
+from .models import SyncRun, create_blog
+from .page_cache import invalidate_pages
+from .sync import sync_blogs
+
+@lru_cache(maxsize=None)
+def staging_storage():
+    """
+    Private storage for uploads waiting for a worker, never served
+    """
+    location = getattr(settings, 'BLOG_UPLOAD_STAGING_ROOT', None)
+    location = location or os.path.join(tempfile.gettempdir(), 'blog-upload-staging')
+    return FileSystemStorage(location=location)
+
+
+def stage_upload(uploaded_file):
+    """
+    Save an uploaded file where a worker can read it and return its storage name
+    """
+    name = os.path.basename(uploaded_file.name)
+    return staging_storage().save(f'{uuid.uuid4().hex}_{name}', uploaded_file)
+
+
+def discard_staged(image=None, **payload):
+    # The job is dead: nobody will forward this upload any more
+    if image:
+        staging_storage().delete(image)
+
+
+@task('blog.forward_post', on_dead=discard_staged)
+def forward_post(data, image=None, filename=None, content_type=None, blog_id=None, previous=None):
+    """
+    Create (or, with ``blog_id``, update) a post in the REST API with its staged image.
+
+    ``previous`` holds the ``slug`` and ``Category`` an updated post had, so
+    the pages it is leaving are retired too.
+    """
+    files = None
+    image_file = None
+    try:
+        if image:
+            image_file = staging_storage().open(image, 'rb')
+            content_type = content_type or mimetypes.guess_type(image)[0] or 'application/octet-stream'
+            files = {'image': (filename or os.path.basename(image), image_file, content_type)}
+        if blog_id is None:
+            response = get_client().upload('POST', 'blogs/', data=data, files=files)
+        else:
+            response = get_client().upload('PUT', f'blogs/{blog_id}/', data=data, files=files)
+    finally:
+        if image_file is not None:
+            image_file.close()
+
+    if response.status_code not in [200, 201]:
+        raise RuntimeError(f'API answered {response.status_code}: {response.text[:500]}')
+    invalidate_blogs()
+    previous = previous or {}
+    invalidate_pages(
+        slugs=[previous.get('slug'), data.get('slug')],
+        categories=[previous.get('Category'), data.get('Category')],
+    )
+    mirror.record_response(data, response)
+    if image:
+        staging_storage().delete(image)
+
+
+def queue_post(data, uploaded_file, blog_id=None, previous=None):
+    """
+    Stage ``uploaded_file`` and queue a job to send the post to the API
+    """
+    return enqueue('blog.forward_post', {
+        'data': data,
+        'image': stage_upload(uploaded_file),
+        'filename': os.path.basename(uploaded_file.name),
+        'content_type': uploaded_file.content_type,
+        'blog_id': blog_id,
+        'previous': previous,
+    })
+
+
+@task('blog.contact_email')
+def send_contact_email(name, email, message, subject=''):
+    EmailMessage(
+        subject=f'[Contact] {subject or name}',
+        body=f'From: {name} <{email}>\n\n{message}',
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[getattr(settings, 'CONTACT_EMAIL', settings.DEFAULT_FROM_EMAIL)],
+        reply_to=[email] if email else None,
+    ).send()
+
+
+def queue_contact_email(name, email, message, subject=''):
+    return enqueue('blog.contact_email', {
+        'name': name or '',
+        'email': email or '',
+        'message': message or '',
+        'subject': subject or '',
+    })
+
+
+@task('blog.sync_blogs')
+def run_sync(run_id, force=False):
+    sync_blogs(run=SyncRun.objects.get(pk=run_id), force=force)
+
+
+def queue_sync(force=False):
+    """
+    Create a ``SyncRun`` and queue a job to carry it out
+    """
+    run = SyncRun.objects.create()
+    enqueue('blog.sync_blogs', {'run_id': run.pk, 'force': force}, max_attempts=3)
+    return run
+
+
+@task('blog.image_variants')
+def build_image_variants(blog_id):
+    blog = create_blog.objects.filter(pk=blog_id).only('id', 'image', 'image_variants').first()
+    if blog is not None and needs_variants(blog):
+        update_variants(blog)
+
+
+def queue_image_variants(blog_id):
+    return enqueue('blog.image_variants', {'blog_id': blog_id}, max_attempts=3)
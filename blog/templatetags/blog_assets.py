@@ -0,0 +1,48 @@
+"""
+Stylesheet links shared by the page templates::
+
+    {% load blog_assets %}
+    {% site_css %}
+
+Renders a link to the Tailwind build made by ``manage.py build_css``.
+Until that has been run (e.g. on a fresh checkout) it falls back to the
+Tailwind Play CDN and Google Fonts, which the pages used before.
+"""
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+SITE_CSS = 'css/site.css'
+
+CDN_FALLBACK = mark_safe(
+    '<script src="https://cdn.tailwindcss.com"></script>\n'
+    '    <script>tailwind.config = { darkMode: \'class\' }</script>\n'
+    '    <link rel="preconnect" href="https://fonts.googleapis.com">\n'
+    '    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>\n'
+    '    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700;800&display=swap" rel="stylesheet">'
+)
+
+_built = None
+
+
+def site_css_built():
+    global _built
+    if settings.DEBUG:
+        # Pick the build up as soon as it exists while developing
+        return finders.find(SITE_CSS) is not None
+    if _built is None:
+        _built = staticfiles_storage.exists(SITE_CSS)
+    return _built
+
+
+@register.simple_tag
+def site_css():
+    if not site_css_built():
+        return CDN_FALLBACK
+    return format_html('<link rel="stylesheet" href="{}">', static(SITE_CSS))
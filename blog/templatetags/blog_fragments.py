@@ -0,0 +1,33 @@
+"""
+Keys for cached template fragments::
+
+    {% load cache blog_fragments %}
+    {% cache 86400 post_card post|post_version %}...{% endcache %}
+
+``post_version`` changes whenever anything a post card shows does, for
+``create_blog`` instances and for post dicts from the upstream API alike,
+so edited posts get a fresh fragment without explicit invalidation.
+"""
+from django import template
+
+register = template.Library()
+
+# What a card shows, for API posts that don't carry ``updated_at``
+CARD_KEYS = ('title', 'slug', 'Author_name', 'Category', 'date', 'excerpt', 'content', 'image_url', 'image')
+
+
+@register.filter
+def post_version(post):
+    if isinstance(post, dict):
+        get = post.get
+    else:
+        def get(name):
+            return getattr(post, name, None)
+    variants = get('image_variants') or {}
+    # Derivatives are stored without a save(), so updated_at misses them
+    parts = [get('id'), variants.get('hash'), variants.get('source')]
+    if get('updated_at'):
+        parts += [get('updated_at'), get('image')]
+    else:
+        parts += [get(key) for key in CARD_KEYS]
+    return '|'.join(str(part) for part in parts)
@@ -0,0 +1,54 @@
+"""
+Template helpers for the image derivatives built by ``blog.images``::
+
+    {% load blog_images %}
+    {% responsive_image post 'card' sizes='(min-width: 768px) 33vw, 100vw' alt=post.title css_class='w-full' %}
+    <img src="..." srcset="{{ post|srcset }}" sizes="...">
+"""
+from django import template
+from django.utils.html import format_html
+
+from ..images import SIZES, variant_urls
+
+register = template.Library()
+
+
+def _variants(post):
+    if isinstance(post, dict):
+        return post.get('image_variants') or {}
+    return getattr(post, 'image_variants', None) or {}
+
+
+@register.filter
+def srcset(post, format=None):
+    """
+    ``srcset`` value for a post's derivatives; ``post|srcset:'webp'`` for WebP
+    """
+    return ', '.join(f'{url} {width}w' for url, width, _ in variant_urls(_variants(post), format or None))
+
+
+@register.simple_tag
+def responsive_image(post, size='card', sizes='100vw', alt='', css_class='', eager=False):
+    """
+    ``<picture>`` with WebP and source-format ``srcset``s, defaulting to the
+    ``size`` derivative. Renders nothing when the post has no derivatives.
+    """
+    variants = _variants(post)
+    chosen = variants.get('variants', {}).get(size if size in SIZES else 'card')
+    if not chosen:
+        return ''
+    fallback = variant_urls({'variants': {size: chosen}})
+    if not fallback:
+        return ''
+    src, width, height = fallback[0]
+    loading = 'eager' if eager else 'lazy'
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" class="{}" '
+        'loading="{}" decoding="async"{}>'
+        '</picture>',
+        srcset(post, 'webp'), sizes,
+        src, srcset(post), sizes, width, height, alt, css_class,
+        loading, format_html(' fetchpriority="high"') if eager else '',
+    )
@@ -1,158 +1,98 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Q
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.utils.http import http_date
 from django.views import View
 from django.core.files.base import ContentFile
+from asgiref.sync import sync_to_async
+import asyncio
 import requests
 import json
 import base64
-from .models import create_blog
+from .models import BlogStats, SyncRun, create_blog
 from .forms import BlogForm
+from .api_client import get_client
+from .async_api import get_async_client
+from .api_cache import get_blogs_from_api, invalidate_blogs, peek_blogs, peek_collection, peek_stamp, warm_blogs
+from .related import related_index
+from .page_cache import API_SCOPE, api_posts_scope, invalidate_pages, no_scope, page_cache
+from .pagination import aget_api_page, clamp_page_size, get_api_page, keyset_list_page, keyset_page
+from .search import blog_index
+from . import mirror
+from .tasks import queue_contact_email, queue_post, queue_sync
+from . import fts
 
-# REST API Configuration
-REST_API_BASE_URL = "http://127.0.0.1:8000/Api/V1"
+# Create your views here.
 
-def send_blog_to_api(blog_instance, image_file=None):
-    """
-    Send blog data to REST API
+def _create_blog_from_form(request, redirect_to, success_message):
     """
-    try:
-        # Prepare data for API
-        data = {
-            'title': blog_instance.title,
-            'slug': blog_instance.slug,
-            'Author_name': blog_instance.Author_name,
-            'content': blog_instance.content,
-            'Category': blog_instance.Category,
+    Validate the posted BlogForm and create the post through the REST API.
+    
+    Returns ``(form, response)``: ``response`` is a redirect once the post
+    has been sent, or None when the bound form should be shown again.
+    """
+    form = BlogForm(request.POST, request.FILES)
+    if form.is_valid():
+        # Send directly to REST API without local save
+        blog_data = {
+            'title': form.cleaned_data['title'],
+            'slug': form.cleaned_data['slug'],
+            'Author_name': form.cleaned_data['Author_name'],
+            'content': form.cleaned_data['content'],
+            'Category': form.cleaned_data['Category'],
         }
         
-        # Handle image file if present
-        files = {}
-        if image_file:
-            files['image'] = (image_file.name, image_file.read(), image_file.content_type)
-        
-        # Send POST request to REST API
-        response = requests.post(
-            f"{REST_API_BASE_URL}/blogs/",
-            data=data,
-            files=files if files else None,
-            timeout=10
-        )
+        if 'image' in request.FILES:
+            # Uploading the image can be slow; a background worker sends the post
+            queue_post(blog_data, request.FILES['image'])
+            messages.success(request, 'Blog post queued. It will appear once its image has been uploaded.')
+            return form, redirect(redirect_to)
         
-        if response.status_code in [200, 201]:
-            return True
-        else:
-            print(f"API Error: {response.status_code} - {response.text}")
-            return False
+        try:
+            # Send directly to REST API
+            response = get_client().post('blogs/', data=blog_data)
             
-    except requests.RequestException as e:
-        print(f"Request Error: {str(e)}")
-        return False
-    except Exception as e:
-        print(f"General Error: {str(e)}")
-        return False
+            if response.status_code in [200, 201]:
+                invalidate_blogs()
+                invalidate_pages(categories=[blog_data['Category']])
+                mirror.record_response(blog_data, response)
+                messages.success(request, success_message)
+            else:
+                messages.error(request, f'Failed to create blog post: {response.status_code}')
+                
+        except requests.RequestException as e:
+            messages.error(request, f'Error connecting to API: {str(e)}')
+        
+        return form, redirect(redirect_to)
+    
+    messages.error(request, 'Please correct the errors below.')
+    return form, None
 
-def get_blogs_from_api():
-    """
-    Fetch blogs from REST API
-    """
-    try:
-        print(f"Fetching blogs from: {REST_API_BASE_URL}/blogs/")
-        response = requests.get(f"{REST_API_BASE_URL}/blogs/", timeout=10)
-        print(f"API Response Status: {response.status_code}")
-        if response.status_code == 200:
-            data = response.json()
-            print(f"API Response Data: {data}")
-            return data
-        else:
-            print(f"API Error Response: {response.text}")
-        return None
-    except requests.RequestException as e:
-        print(f"Connection Error: {str(e)}")
-        return None
 
-# Create your views here.
-
-def blog_list(request):
+@page_cache(scopes=api_posts_scope, query_keys=('page', 'category', 'search'))
+async def blog_list(request):
     """
     Display list of all blog posts from REST API with pagination and filtering
     """
     if request.method == 'POST':
         # Create blog directly through REST API (no local save)
-        form = BlogForm(request.POST, request.FILES)
-        if form.is_valid():
-            # Send directly to REST API without local save
-            blog_data = {
-                'title': form.cleaned_data['title'],
-                'slug': form.cleaned_data['slug'],
-                'Author_name': form.cleaned_data['Author_name'],
-                'content': form.cleaned_data['content'],
-                'Category': form.cleaned_data['Category'],
-            }
-            
-            # Handle image
-            files = {}
-            if 'image' in request.FILES:
-                image_file = request.FILES['image']
-                files['image'] = (image_file.name, image_file.read(), image_file.content_type)
-            
-            try:
-                # Send directly to REST API
-                response = requests.post(
-                    f"{REST_API_BASE_URL}/blogs/",
-                    data=blog_data,
-                    files=files if files else None,
-                    timeout=10
-                )
-                
-                if response.status_code in [200, 201]:
-                    messages.success(request, 'Blog post created successfully!')
-                else:
-                    messages.error(request, f'Failed to create blog post: {response.status_code}')
-                    
-            except requests.RequestException as e:
-                messages.error(request, f'Error connecting to API: {str(e)}')
-            
-            return redirect('blog_list')
-        else:
-            messages.error(request, 'Please correct the errors below.')
+        form, response = await sync_to_async(_create_blog_from_form)(
+            request, 'blog_list', 'Blog post created successfully!'
+        )
+        if response is not None:
+            return response
     else:
         form = BlogForm()
     
-    # Get all blog posts from REST API instead of local database
-    api_data = get_blogs_from_api()
-    blogs = []
-    
-    if api_data and 'results' in api_data:
-        blogs = api_data['results']
-    elif api_data and isinstance(api_data, list):
-        blogs = api_data
-
-    # The API already provides image_url fields, so we don't need additional processing    # Filter by category if provided (client-side filtering)
+    # Ask the REST API for just the page being shown, filtered upstream
     category = request.GET.get('category')
-    if category and blogs:
-        blogs = [blog for blog in blogs if blog.get('Category', '').lower() == category.lower()]
-    
-    # Search functionality (client-side filtering)
     search_query = request.GET.get('search')
-    if search_query and blogs:
-        search_lower = search_query.lower()
-        blogs = [
-            blog for blog in blogs 
-            if search_lower in blog.get('title', '').lower() or 
-               search_lower in blog.get('content', '').lower() or 
-               search_lower in blog.get('Author_name', '').lower()
-        ]
-    
-    # Simple pagination for API data
-    from django.core.paginator import Paginator
-    paginator = Paginator(blogs, 6)  # Show 6 blogs per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = await aget_api_page(request.GET.get('page'), 6, category=category, search=search_query)
     
     # Get categories from model choices (since we can't query API for this)
     try:
@@ -161,7 +101,7 @@ def blog_list(request):
         # Fallback categories if model is not available
         categories = ['web development', 'programming', 'technology', 'news', 'entertainment', 'sports', 'travel', 'lifestyle', 'javascripts']
     
-    return render(request, 'blog/index.html', {
+    return await sync_to_async(render)(request, 'blog/index.html', {
         'page_obj': page_obj,
         'blogs': page_obj,  # For backward compatibility
         'form': form,
@@ -172,61 +112,117 @@ def blog_list(request):
     })
 
 
-def blog_detail(request, slug):
+def _sync_related_index():
     """
-    Display detailed view of a single blog post from API
+    Refresh the related-posts index from the cached collection, if any.
+
+    Never goes upstream on the request path: on a cold cache the collection
+    is fetched in the background and False is returned.
+    """
+    stamp = peek_stamp()
+    if stamp is None:
+        warm_blogs()
+        return False
+    if stamp != related_index.stamp:
+        entry = peek_blogs()
+        if entry is None:
+            return False
+        api_data = entry['data']
+        blogs = []
+        if api_data and 'results' in api_data:
+            blogs = api_data['results']
+        elif api_data and isinstance(api_data, list):
+            blogs = api_data
+        related_index.sync(blogs, stamp)
+    return True
+
+
+def _find_in_collection(api_data, slug):
+    """
+    Find a post by slug in the upstream collection
+    """
+    blogs = []
+    if api_data and 'results' in api_data:
+        blogs = api_data['results']
+    elif api_data and isinstance(api_data, list):
+        blogs = api_data
+    for blog in blogs:
+        if blog.get('slug') == slug:
+            return blog
+    return None
+
+
+def _mirrored_detail(slug):
+    """
+    ``(post, related posts)`` from the local mirror, or None when it can't tell
+    """
+    if not mirror.ready():
+        return None
+    return mirror.detail(slug, related_count=3)
+
+
+def _mirrored_blog(slug):
+    return mirror.get(slug) if mirror.ready() else None
+
+
+async def _fetch_blog(slug):
+    """
+    Get one post from the API: ``(post or None, whether the API answered)``
     """
-    # Get blog from API by slug
     try:
-        response = requests.get(f"{REST_API_BASE_URL}/blogs/slug/{slug}/", timeout=10)
-        if response.status_code == 200:
-            blog = response.json()
-        else:
-            # Try to get all blogs and find by slug
-            api_data = get_blogs_from_api()
-            blogs = []
-            if api_data and 'results' in api_data:
-                blogs = api_data['results']
-            elif api_data and isinstance(api_data, list):
-                blogs = api_data
-            
-            blog = None
-            for b in blogs:
-                if b.get('slug') == slug:
-                    blog = b
-                    break
-            
-            if not blog:
-                messages.error(request, 'Blog post not found.')
-                return redirect('blog_list')
+        response = await get_async_client().get(f"blogs/slug/{slug}/")
     except requests.RequestException:
-        messages.error(request, 'Error connecting to API.')
+        # Includes breaker.CircuitOpenError, raised without trying
+        return None, False
+    if response.status_code == 200:
+        return response.json(), True
+    return None, response.status_code < 500
+
+
+@page_cache(scopes=lambda request, slug: [f'slug:{slug}', API_SCOPE])
+async def blog_detail(request, slug):
+    """
+    Display detailed view of a single blog post from API
+    """
+    # Indexed lookups in the local mirror once a sync has filled it
+    mirrored = await sync_to_async(_mirrored_detail)(slug)
+    if mirrored is not None:
+        blog, related_blogs = mirrored
+        return await sync_to_async(render)(request, 'blog/detail.html', {
+            'blog': blog,
+            'related_blogs': related_blogs,
+            'api_mode': True
+        })
+    
+    # Get blog from API by slug
+    blog, api_available = await _fetch_blog(slug)
+    if blog is None and not api_available:
+        # Upstream unavailable: look in what is cached (never download the
+        # collection for a slug that may not exist), then the local copy
+        blog = _find_in_collection(await sync_to_async(peek_collection)(), slug)
+        if blog is None:
+            blog = await create_blog.objects.filter(slug=slug).afirst()
+    
+    if not blog:
+        messages.error(request, 'Blog post not found.')
         return redirect('blog_list')
     
     # The API already provides image_url fields, so no additional processing needed
     
-    # Get related blogs (same category, excluding current blog)
+    # Get related blogs (same category, excluding current blog) from the
+    # in-process index instead of downloading the whole collection again
+    # (only built once the post is known to exist, so probing unknown slugs
+    # never fetches the collection)
     related_blogs = []
-    try:
-        api_data = get_blogs_from_api()
-        all_blogs = []
-        if api_data and 'results' in api_data:
-            all_blogs = api_data['results']
-        elif api_data and isinstance(api_data, list):
-            all_blogs = api_data
-        
-        # Filter for same category, exclude current blog
-        current_category = blog.get('Category', '')
+    if isinstance(blog, create_blog):
         related_blogs = [
-            b for b in all_blogs 
-            if b.get('Category') == current_category and b.get('slug') != slug
-        ][:3]  # Limit to 3 related blogs
-        
-        # The API already provides image_url fields for related blogs too
-    except:
-        pass
+            post async for post in
+            create_blog.objects.cards().filter(Category=blog.Category).exclude(pk=blog.pk).order_by('-date')[:3]
+        ]
+    elif await sync_to_async(_sync_related_index)():
+        related_blogs = related_index.related(blog.get('Category', ''), exclude_slug=slug, limit=3)
     
-    return render(request, 'blog/detail.html', {
+    return await sync_to_async(render)(request, 'blog/detail.html', {
         'blog': blog,
         'related_blogs': related_blogs,
         'api_mode': True
@@ -237,31 +233,21 @@ def blog_edit(request, slug):
     """
     Edit a blog post via API
     """
-    # Get blog from API by slug
-    try:
-        response = requests.get(f"{REST_API_BASE_URL}/blogs/slug/{slug}/", timeout=10)
-        if response.status_code == 200:
-            blog = response.json()
-        else:
-            # Try to get all blogs and find by slug
-            api_data = get_blogs_from_api()
-            blogs = []
-            if api_data and 'results' in api_data:
-                blogs = api_data['results']
-            elif api_data and isinstance(api_data, list):
-                blogs = api_data
-            
-            blog = None
-            for b in blogs:
-                if b.get('slug') == slug:
-                    blog = b
-                    break
-            
-            if not blog:
-                messages.error(request, 'Blog post not found.')
-                return redirect('blog_list')
-    except requests.RequestException:
-        messages.error(request, 'Error connecting to API.')
+    # Get blog from the local mirror, or from API by slug
+    blog = _mirrored_blog(slug)
+    if blog is None:
+        try:
+            response = get_client().get(f"blogs/slug/{slug}/")
+            if response.status_code == 200:
+                blog = response.json()
+        except requests.RequestException:
+            # Upstream down (or the circuit is open): edit from the cached copy
+            pass
+    if blog is None:
+        # Try to get all blogs and find by slug
+        blog = _find_in_collection(get_blogs_from_api(), slug)
+    if not blog:
+        messages.error(request, 'Blog post not found.')
         return redirect('blog_list')
     
     if request.method == 'POST':
@@ -277,22 +263,26 @@ def blog_edit(request, slug):
                 'Category': form.cleaned_data['Category'],
             }
             
-            # Handle image
-            files = {}
             if 'image' in request.FILES:
-                image_file = request.FILES['image']
-                files['image'] = (image_file.name, image_file.read(), image_file.content_type)
+                # Uploading the image can be slow; a background worker sends the update
+                queue_post(
+                    blog_data, request.FILES['image'], blog_id=blog.get('id'),
+                    previous={'slug': slug, 'Category': blog.get('Category')},
+                )
+                messages.success(request, 'Blog post update queued. It will show once its image has been uploaded.')
+                return redirect('blog_detail', slug=slug)
             
             try:
                 # Send PUT request to REST API
-                response = requests.put(
-                    f"{REST_API_BASE_URL}/blogs/{blog.get('id')}/",
-                    data=blog_data,
-                    files=files if files else None,
-                    timeout=10
-                )
+                response = get_client().put(f"blogs/{blog.get('id')}/", data=blog_data)
                 
                 if response.status_code in [200, 201]:
+                    invalidate_blogs()
+                    invalidate_pages(
+                        slugs=[slug, blog_data['slug']],
+                        categories=[blog.get('Category'), blog_data['Category']],
+                    )
+                    mirror.record_response({**blog, **blog_data}, response)
                     messages.success(request, 'Blog post updated successfully!')
                     return redirect('blog_detail', slug=form.cleaned_data['slug'])
                 else:
@@ -327,37 +317,28 @@ def blog_delete(request, slug):
     if request.method == 'POST':
         # Get blog ID first
         try:
-            response = requests.get(f"{REST_API_BASE_URL}/blogs/slug/{slug}/", timeout=10)
-            if response.status_code == 200:
-                blog = response.json()
-                blog_id = blog.get('id')
-            else:
-                # Try to get all blogs and find by slug
-                api_data = get_blogs_from_api()
-                blogs = []
-                if api_data and 'results' in api_data:
-                    blogs = api_data['results']
-                elif api_data and isinstance(api_data, list):
-                    blogs = api_data
-                
-                blog = None
-                for b in blogs:
-                    if b.get('slug') == slug:
-                        blog = b
-                        blog_id = b.get('id')
-                        break
-                
-                if not blog:
-                    messages.error(request, 'Blog post not found.')
-                    return redirect('blog_list')
+            blog = _mirrored_blog(slug)
+            if blog is None:
+                response = get_client().get(f"blogs/slug/{slug}/")
+                if response.status_code == 200:
+                    blog = response.json()
+                else:
+                    # Try to get all blogs and find by slug
+                    blog = _find_in_collection(get_blogs_from_api(), slug)
+            
+            if not blog:
+                messages.error(request, 'Blog post not found.')
+                return redirect('blog_list')
+            blog_id = blog.get('id')
             
             # Send DELETE request to REST API
-            delete_response = requests.delete(
-                f"{REST_API_BASE_URL}/blogs/{blog_id}/",
-                timeout=10
-            )
+            delete_response = get_client().delete(f"blogs/{blog_id}/")
             
             if delete_response.status_code in [200, 204]:
+                invalidate_blogs()
+                invalidate_pages(slugs=[slug], categories=[blog.get('Category')])
+                related_index.discard(slug)
+                mirror.forget(slug)
                 messages.success(request, 'Blog post deleted successfully!')
             else:
                 messages.error(request, f'Failed to delete blog post: {delete_response.status_code}')
@@ -368,16 +349,19 @@ def blog_delete(request, slug):
     return redirect('blog_list')
 
 
+@page_cache(scopes=lambda request, category: [f'category:{category.lower()}'], query_keys=('cursor', 'page_size'))
 def blog_category(request, category):
     """
     Display blogs filtered by category
     """
-    blogs = create_blog.objects.filter(Category__iexact=category).order_by('-date')
+    # Categories are stored lowercase, so an exact match can use the
+    # (Category, -date) index
+    category = category.lower()
+    blogs = create_blog.objects.cards().filter(Category=category)
     
-    # Pagination
-    paginator = Paginator(blogs, 6)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination on (date, id): deep pages cost the same as page 1
+    page_size = clamp_page_size(request.GET.get('page_size'), 6)
+    page_obj = keyset_page(blogs, request.GET.get('cursor'), page_size)
     
     # Get category display name
     category_display = dict(create_blog.typeofblog).get(category, category.title())
@@ -395,42 +379,49 @@ def blog_search(request):
     Handle blog search functionality
     """
     query = request.GET.get('q', '')
-    blogs = create_blog.objects.none()
-    
-    if query:
-        blogs = create_blog.objects.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(Author_name__icontains=query)
-        ).order_by('-date')
+    cursor = request.GET.get('cursor')
+    page_size = clamp_page_size(request.GET.get('page_size'), 6)
     
-    # Pagination
-    paginator = Paginator(blogs, 6)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Results are ranked by relevance, so the keyset is (rank, id)
+    if fts.available():
+        # SQLite FTS5 index, ranked by bm25 (lower is better)
+        blogs = create_blog.objects.none()
+        if query:
+            blogs = fts.search_queryset(create_blog.objects.cards(), query)
+        page_obj = keyset_page(blogs, cursor, page_size, field='rank', descending=False)
+        total_results = blogs.count()
+    else:
+        ranked = []
+        if query:
+            # Ranked ids from the in-process inverted index (title hits first)
+            ranked = blog_index.search(query)
+        
+        # Only the current page is loaded from the database
+        page_obj = keyset_list_page(ranked, cursor, page_size)
+        found = create_blog.objects.cards().in_bulk([blog_id for blog_id, score in page_obj.object_list])
+        page_obj.object_list = [found[blog_id] for blog_id, score in page_obj.object_list if blog_id in found]
+        total_results = len(ranked)
     
     return render(request, 'blog/search_results.html', {
         'page_obj': page_obj,
         'blogs': page_obj,
         'query': query,
-        'total_results': blogs.count()
+        'total_results': total_results
     })
 
 
+@page_cache(query_keys=('cursor', 'limit'))
 def recent_blogs(request):
     """
     Get recent blog posts
     """
-    limit = request.GET.get('limit', 5)
-    try:
-        limit = int(limit)
-    except ValueError:
-        limit = 5
-    
-    recent_blogs = create_blog.objects.all().order_by('-date')[:limit]
+    # Bounded page size, so ?limit=10000000 can't load the whole table
+    limit = clamp_page_size(request.GET.get('limit'), 5)
+    page_obj = keyset_page(create_blog.objects.cards(), request.GET.get('cursor'), limit)
     
     return render(request, 'blog/recent_blogs.html', {
-        'recent_blogs': recent_blogs
+        'recent_blogs': page_obj,
+        'page_obj': page_obj,
     })
 
 
@@ -454,12 +445,16 @@ def api_create_blog(request):
                 # Note: image handling would need special treatment for file uploads
             )
             
-            return JsonResponse({
+            response = JsonResponse({
                 'success': True,
                 'message': 'Blog created successfully!',
                 'blog_id': blog.id,
                 'slug': blog.slug
             })
+            # Validators of the new post, so clients can revalidate it later
+            response['ETag'] = f'"{blog.id}-{int(blog.date.timestamp()):x}"'
+            response['Last-Modified'] = http_date(blog.date.timestamp())
+            return response
             
         except Exception as e:
             return JsonResponse({
@@ -474,14 +469,19 @@ def blog_stats(request):
     """
     Display blog statistics
     """
-    total_blogs = create_blog.objects.count()
+    # Counts come from the materialized BlogStats table (one query); if it
+    # has never been filled, compute it with a single aggregate query
+    counts = dict(BlogStats.objects.values_list('category', 'count'))
+    if not counts:
+        counts = BlogStats.recompute()
+    
+    total_blogs = sum(counts.values())
     categories_stats = {}
     
     for category_key, category_display in create_blog.typeofblog:
-        count = create_blog.objects.filter(Category=category_key).count()
         categories_stats[category_key] = {
             'display_name': category_display,
-            'count': count
+            'count': counts.get(category_key, 0)
         }
     
     return render(request, 'blog/stats.html', {
@@ -495,36 +495,32 @@ class BlogAPIIntegration(View):
     Integration with REST API for external data
     """
     
-    def get_api_data(self, endpoint):
+    async def get_api_data(self, endpoint):
         """
         Helper method to fetch data from REST API
         """
-        try:
-            # Assuming your REST API is running on localhost:8000
-            api_url = f"http://127.0.0.1:8000/Api/V1/{endpoint}"
-            response = requests.get(api_url, timeout=5)
-            if response.status_code == 200:
-                return response.json()
-        except requests.RequestException:
-            pass
-        return None
+        return await get_async_client().get_json(endpoint, timeout=5)
     
-    def get(self, request):
+    async def get(self, request):
         """
         Display API integration page
         """
-        # Fetch data from REST API
-        api_blogs = self.get_api_data('blogs/')
-        api_categories = self.get_api_data('categories/')
-        api_stats = self.get_api_data('stats/')
+        # Fetch data from REST API; the three calls run concurrently, so the
+        # page waits for the slowest one rather than for all of them in turn
+        api_blogs, api_categories, api_stats = await asyncio.gather(
+            self.get_api_data('blogs/'),
+            self.get_api_data('categories/'),
+            self.get_api_data('stats/'),
+        )
         
-        return render(request, 'blog/api_integration.html', {
+        return await sync_to_async(render)(request, 'blog/api_integration.html', {
             'api_blogs': api_blogs,
             'api_categories': api_categories,
             'api_stats': api_stats
         })
 
 
+@page_cache(scopes=no_scope)
 def about(request):
     """
     About page view
@@ -542,7 +538,8 @@ def contact(request):
         email = request.POST.get('email')
         message = request.POST.get('message')
         
-        # You can add email sending logic here
+        # Sent by a background worker
+        queue_contact_email(name, email, message)
         messages.success(request, 'Thank you for your message! We will get back to you soon.')
         return redirect('contact')
     
@@ -555,59 +552,27 @@ def api_blog_list(request):
     """
     if request.method == 'POST':
         # Create blog directly through REST API
-        form = BlogForm(request.POST, request.FILES)
-        if form.is_valid():
-            # Don't save locally, send directly to API
-            blog_data = {
-                'title': form.cleaned_data['title'],
-                'slug': form.cleaned_data['slug'],
-                'Author_name': form.cleaned_data['Author_name'],
-                'content': form.cleaned_data['content'],
-                'Category': form.cleaned_data['Category'],
-            }
-            
-            # Handle image
-            files = {}
-            if 'image' in request.FILES:
-                image_file = request.FILES['image']
-                files['image'] = (image_file.name, image_file.read(), image_file.content_type)
-            
-            try:
-                # Send directly to REST API
-                response = requests.post(
-                    f"{REST_API_BASE_URL}/blogs/",
-                    data=blog_data,
-                    files=files if files else None,
-                    timeout=10
-                )
-                
-                if response.status_code in [200, 201]:
-                    messages.success(request, 'Blog post created successfully in REST API!')
-                else:
-                    messages.error(request, f'Failed to create blog post: {response.status_code}')
-                    
-            except requests.RequestException as e:
-                messages.error(request, f'Error connecting to API: {str(e)}')
-            
-            return redirect('api_blog_list')
-        else:
-            messages.error(request, 'Please correct the errors below.')
+        form, response = _create_blog_from_form(
+            request, 'api_blog_list', 'Blog post created successfully in REST API!'
+        )
+        if response is not None:
+            return response
     else:
         form = BlogForm()
     
-    # Get blogs from REST API
-    api_data = get_blogs_from_api()
-    blogs = []
-    
-    if api_data and 'results' in api_data:
-        blogs = api_data['results']
-    elif api_data and isinstance(api_data, list):
-        blogs = api_data
+    # Get one page of blogs from REST API
+    page_obj = get_api_page(
+        request.GET.get('page'),
+        12,
+        category=request.GET.get('category'),
+        search=request.GET.get('search'),
+    )
     
     return render(request, 'blog/api_blog_list.html', {
-        'blogs': blogs,
+        'page_obj': page_obj,
+        'blogs': page_obj.object_list,
         'form': form,
-        'api_url': REST_API_BASE_URL
+        'api_url': get_client().base_url
     })
 
 
@@ -616,18 +581,14 @@ def sync_blogs_to_api(request):
     Sync all local blogs to REST API
     """
     if request.method == 'POST':
-        local_blogs = create_blog.objects.all()
-        success_count = 0
-        error_count = 0
-        
-        for blog in local_blogs:
-            success = send_blog_to_api(blog)
-            if success:
-                success_count += 1
-            else:
-                error_count += 1
-        
-        messages.success(request, f'Sync completed: {success_count} successful, {error_count} errors')
-        return redirect('blog_list')
+        # Pushed by a background worker; this request only queues the run
+        run = queue_sync()
+        messages.success(request, 'Sync queued. Only new or changed posts will be sent.')
+        return redirect(f"{reverse('sync_blogs_to_api')}?run={run.pk}")
+    
+    run = None
+    run_id = request.GET.get('run')
+    if run_id and run_id.isdigit():
+        run = SyncRun.objects.filter(pk=run_id).first()
     
-    return render(request, 'blog/sync_confirmation.html')
\ No newline at end of file
+    return render(request, 'blog/sync_confirmation.html', {'run': run})
@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogsite.settings')
 
 application = get_asgi_application()
+
+from blog.async_api import serve_asgi  # noqa: E402
+
+serve_asgi()
@@ -42,6 +42,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its totals cover the other middleware too
+    'blog.instrumentation.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -69,6 +71,16 @@ TEMPLATES = [
     },
 ]
 
+if not DEBUG:
+    # Compile each template once per process instead of on every render
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'blogsite.wsgi.application'
 
 
@@ -83,6 +95,46 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The default cache holds state every web and worker process must see: the
+# circuit breaker, the page-cache and search generations, the API snapshot
+# and the mirror's ready flag. It must not be per process (locmem), see
+# blog/checks.py, and must not evict: those keys are few, so MAX_ENTRIES is
+# set far above what they reach. Whole pages go to 'pages', which may cull.
+# Files under cache/ are shared by the processes on this host; set
+# REDIS_URL to share them between hosts (with a volatile-* maxmemory
+# policy, so keys stored without a timeout are never evicted).
+REDIS_URL = os.environ.get('REDIS_URL')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'default',
+        'OPTIONS': {'MAX_ENTRIES': 1000000},
+    },
+    # Rendered pages (see blog/page_cache.py)
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'KEY_PREFIX': 'pages',
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'pages',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # {% cache %} fragments (navigation, post cards). Kept per process so a
+    # deploy, which restarts the workers, never serves markup from old templates.
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blogsite-fragments',
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -119,12 +171,161 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# Outside DEBUG, `collectstatic` writes content-hashed names plus .gz/.br
+# siblings (see blog/storage.py) that can be cached forever
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'blog.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+
+
+# Tailwind v3 CLI for `manage.py build_css`, which writes static/css/site.css
+# (run it before collectstatic). None tries `tailwindcss` on PATH, then npx.
+TAILWIND_CLI = None
 
 
 MEDIA_URL='/media/'
 MEDIA_ROOT=os.path.join(BASE_DIR,'media')   
 
+# Uploads waiting for a background worker (see blog/tasks.py). Keep this
+# outside MEDIA_ROOT: everything there is served publicly.
+BLOG_UPLOAD_STAGING_ROOT = os.path.join(BASE_DIR, 'upload_staging')
+
+# Hand file bodies to the web server instead of streaming them from Python
+# (see blog/serving.py): None, 'x-sendfile' or 'x-accel-redirect'. For nginx,
+# ROOTS maps each document root to its `internal` location, e.g.
+# {MEDIA_ROOT: '/protected-media/'}.
+BLOG_SENDFILE = {
+    'BACKEND': None,
+    'ROOTS': {},
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Largest page size any listing accepts from the query string
+BLOG_MAX_PAGE_SIZE = 50
+
+# Largest image accepted by BlogForm, in bytes. Uploads above
+# FILE_UPLOAD_MAX_MEMORY_SIZE are spooled to a temp file, not kept in RAM.
+BLOG_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+
+
+# Upstream blog REST API (see blog/api_client.py)
+
+REST_API_BASE_URL = 'http://127.0.0.1:8000/Api/V1'
+
+BLOG_API = {
+    'POOL_CONNECTIONS': 4,
+    'POOL_MAXSIZE': 10,
+    'MAX_RETRIES': 2,
+    'BACKOFF_FACTOR': 0.2,
+    'TIMEOUT': 10,
+    'TIMEOUTS': {
+        'categories/': 5,
+        'stats/': 5,
+    },
+    # Blog collection cache: fresh for CACHE_TTL, then served stale for up
+    # to CACHE_STALE_TTL more seconds while one request revalidates it
+    'CACHE_ALIAS': 'default',
+    'CACHE_TTL': 30,
+    'CACHE_STALE_TTL': 300,
+    # manage.py sync_blogs: concurrent uploads, rows per batch, and an
+    # optional upstream endpoint accepting a JSON list of posts
+    'SYNC_WORKERS': 4,
+    'SYNC_CHUNK_SIZE': 200,
+    'BULK_ENDPOINT': None,
+    # Circuit breaker: after BREAKER_FAILURES failed calls within
+    # BREAKER_WINDOW seconds, stop calling upstream for BREAKER_RESET_TIMEOUT
+    # seconds and serve cached or local posts instead
+    'BREAKER_FAILURES': 5,
+    'BREAKER_WINDOW': 30,
+    'BREAKER_RESET_TIMEOUT': 30,
+    # One log line per upstream call on the 'blog.api' logger; successful
+    # calls are sampled, failures always logged
+    'LOG_SAMPLE_RATE': 1.0,
+    'LOG_SAMPLE_RATES': {
+        # Fetched on most page views
+        'blogs/': 0.1,
+    },
+}
+
+
+
+# Per-request timing (see blog/instrumentation.py): Server-Timing headers,
+# histograms at /metrics/, and a log of slow requests with their queries
+
+BLOG_INSTRUMENTATION = {
+    'SERVER_TIMING': DEBUG,
+    'SLOW_REQUEST_MS': 1000,
+    'MAX_CAPTURED_QUERIES': 50,
+}
+
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'compact': {
+            'format': '{asctime} {levelname} {name} {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'compact',
+        },
+    },
+    'loggers': {
+        # Set to DEBUG to also log upstream response bodies
+        'blog': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+
+# Background jobs (see blog/jobs.py), run with `manage.py run_workers`
+
+BLOG_JOBS = {
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_BASE': 5,
+    'BACKOFF_MAX': 600,
+    'POLL_INTERVAL': 1.0,
+    # Requeue jobs left running this long by a worker that died
+    'LOCK_TIMEOUT': 600,
+}
+
+# Full-page cache for anonymous GETs (see blog/page_cache.py)
+BLOG_PAGE_CACHE = {
+    'CACHE_ALIAS': 'pages',
+    # Generation counters must survive culling, so they stay in 'default'
+    'GENERATION_CACHE_ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+# /metrics/ is open in DEBUG and to INTERNAL_IPS (e.g. a Prometheus
+# scraper on the same host); anyone else needs BLOG_METRICS_TOKEN, sent as
+# "Authorization: Bearer <token>". Without a token they get 403.
+INTERNAL_IPS = ['127.0.0.1']
+BLOG_METRICS_TOKEN = os.environ.get('BLOG_METRICS_TOKEN')
+
+# Contact form messages are emailed here by the background workers
+CONTACT_EMAIL = 'webmaster@localhost'
+
+if DEBUG:
+    EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
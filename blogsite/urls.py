@@ -15,10 +15,10 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from . import views
 from django.conf import settings
-from django.conf.urls.static import static
+from blog import serving
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -27,4 +27,13 @@ urlpatterns = [
     path('categories/', views.categories, name='categories'),  
     path('contact/', views.contact, name='contact'),
     path('blog/', include('blog.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    path('metrics/', views.metrics, name='metrics'),
+    # Conditional GETs, byte ranges and optional X-Sendfile handoff
+    re_path(rf"^{settings.MEDIA_URL.strip('/')}/(?P<path>.*)$", serving.serve_media, name='media'),
+]
+
+if not settings.DEBUG:
+    # runserver serves static files itself in DEBUG
+    urlpatterns += [
+        re_path(rf"^{settings.STATIC_URL.strip('/')}/(?P<path>.*)$", serving.serve_static, name='static'),
+    ]
\ No newline at end of file
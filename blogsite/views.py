@@ -1,23 +1,16 @@
 from django.shortcuts import render 
+from django.conf import settings
+from django.http import HttpResponse
 from django.contrib import messages
-import requests
+from asgiref.sync import sync_to_async
+from blog import mirror
+from blog.api_cache import aget_blogs_from_api
+from blog.tasks import queue_contact_email
+from blog.metrics import render_prometheus
+from blog.page_cache import api_posts_scope, no_scope, page_cache
 
-# REST API Configuration
-REST_API_BASE_URL = "http://127.0.0.1:8000/Api/V1"
-
-def get_blogs_from_api():
-    """
-    Fetch blogs from REST API
-    """
-    try:
-        response = requests.get(f"{REST_API_BASE_URL}/blogs/", timeout=10)
-        if response.status_code == 200:
-            return response.json()
-        return None
-    except requests.RequestException:
-        return None
-
-def home(request):
+@page_cache(scopes=api_posts_scope)
+async def home(request):
     """Render the home page with latest blog posts from API or local database"""
     # Import local blog model for fallback
     from blog.models import create_blog
@@ -26,14 +19,24 @@ def home(request):
     latest_blogs = []
     api_mode = True
     
-    try:
-        api_data = get_blogs_from_api()
-        if api_data and 'results' in api_data:
-            latest_blogs = api_data['results'][:6]
-        elif api_data and isinstance(api_data, list):
-            latest_blogs = api_data[:6]
-        
-        # Process image URLs for each blog
+    # None only when upstream is unreachable (or the circuit breaker is
+    # open) and nothing is cached, not even an old snapshot
+    if await sync_to_async(mirror.ready)():
+        # Newest posts straight from the local mirror's date index
+        api_data = await sync_to_async(mirror.latest)(6)
+    else:
+        api_data = await aget_blogs_from_api()
+    if api_data is None:
+        # Fall back to the local database
+        api_mode = False
+        latest_blogs = [blog async for blog in create_blog.objects.cards().order_by('-date')[:6]]
+    elif 'results' in api_data:
+        latest_blogs = api_data['results'][:6]
+    elif isinstance(api_data, list):
+        latest_blogs = api_data[:6]
+    
+    # Process image URLs for each blog
+    if api_mode:
         for blog in latest_blogs:
             if blog.get('image') and not blog.get('image_url'):
                 image_path = blog['image']
@@ -43,27 +46,22 @@ def home(request):
                     blog['image_url'] = f"http://127.0.0.1:8000/media/{image_path}"
                 else:
                     blog['image_url'] = image_path
-    except:
-        # If API fails, fall back to local database
-        api_mode = False
-        try:
-            latest_blogs = list(create_blog.objects.all().order_by('-date')[:6])
-        except:
-            latest_blogs = []
     
     # Set featured post (first blog if available)
     featured_post = latest_blogs[0] if latest_blogs else None
     
-    return render(request, 'home.html', {
+    return await sync_to_async(render)(request, 'home.html', {
         'latest_blogs': latest_blogs,
         'featured_post': featured_post,
         'api_mode': api_mode
     })
 
+@page_cache(scopes=no_scope)
 def about(request):
     """Render the about page"""
     return render(request, 'about.html')
     
+@page_cache(scopes=no_scope)
 def categories(request):
     """Render the Categories page"""
     return render(request, 'categories.html')
@@ -76,8 +74,19 @@ def contact(request):
         subject = request.POST.get('subject')
         message = request.POST.get('message')
         
-        # You can add logic here to save to database or send email
-        # For now, we'll just show a success message
+        # Emailed by a background worker so the page answers straight away
+        queue_contact_email(name, email, message, subject=subject)
         messages.success(request, f'Thank you {name}! Your message has been received. We will get back to you soon.')
         
-    return render(request, 'contact.html')
\ No newline at end of file
+    return render(request, 'contact.html')
+
+def metrics(request):
+    """Expose in-process metrics in the Prometheus text format"""
+    # Latencies, cache hit rates and breaker state are not for the public:
+    # open in DEBUG or to INTERNAL_IPS, otherwise only with the token
+    internal = settings.DEBUG or request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+    if not internal:
+        token = getattr(settings, 'BLOG_METRICS_TOKEN', None)
+        if not token or request.headers.get('Authorization') != f'Bearer {token}':
+            return HttpResponse(status=403)
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,21 @@
+// Tailwind CSS v3 configuration for `python manage.py build_css`.
+// Every file that can contain class names has to be listed in `content`,
+// otherwise the classes it uses are purged from the build.
+module.exports = {
+  darkMode: 'class',
+  content: [
+    './Templates/**/*.html',
+    './blog/Templates/**/*.html',
+    './blog/forms.py',
+    './blog/templatetags/*.py',
+    './static/**/*.js',
+  ],
+  theme: {
+    extend: {
+      fontFamily: {
+        sans: ['Inter', 'ui-sans-serif', 'system-ui', '-apple-system', 'Segoe UI', 'Roboto', 'sans-serif'],
+      },
+    },
+  },
+  plugins: [],
+}